@@ -0,0 +1,57 @@
+"""Store connection type as string
+
+Revision ID: cd6655586498
+Revises: 5c679ec55705
+Create Date: 2026-10-15 10:02:17.604512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cd6655586498'
+down_revision: Union[str, None] = '5c679ec55705'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+connection_type_enum = sa.Enum('MAIN', 'SUB', name='connectiontype')
+
+
+def upgrade() -> None:
+    # The native enum stored member names; convert them to the ConnectionType values
+    op.alter_column(
+        'connections',
+        'type_of_connection',
+        existing_type=connection_type_enum,
+        type_=sa.String(length=32),
+        nullable=False,
+        postgresql_using=(
+            "CASE type_of_connection::text WHEN 'SUB' THEN 'sub_connection' "
+            "ELSE 'main_connection' END"
+        ),
+    )
+    op.create_check_constraint(
+        'ck_connections_type_of_connection',
+        'connections',
+        "type_of_connection IN ('main_connection', 'sub_connection')",
+    )
+    connection_type_enum.drop(op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    connection_type_enum.create(op.get_bind(), checkfirst=True)
+    op.drop_constraint('ck_connections_type_of_connection', 'connections', type_='check')
+    op.alter_column(
+        'connections',
+        'type_of_connection',
+        existing_type=sa.String(length=32),
+        type_=connection_type_enum,
+        nullable=True,
+        postgresql_using=(
+            "(CASE type_of_connection WHEN 'sub_connection' THEN 'SUB' "
+            "ELSE 'MAIN' END)::connectiontype"
+        ),
+    )
@@ -1,14 +1,26 @@
-from pydantic_settings import BaseSettings
-import os
+from functools import lru_cache
+from typing import Optional
+from pydantic import PostgresDsn
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-database_url = "postgresql://my_user:my_password@db:5432/my_database"
 
 class Settings(BaseSettings):
-    DATABASE_URL: str = database_url
+    DATABASE_URL: PostgresDsn  # Required; validated at startup
+    OPENAI_API_KEY: Optional[str] = None
+    DEBUG: bool = False  # Raise on unintended lazy loads and log SQL statements per request
 
+    model_config = SettingsConfigDict(env_file=".env")
 
-    class Config:
-        env_file = ".env"
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the application settings, reading the environment and .env file only once.
 
-settings = Settings()
\ No newline at end of file
+    Raises a validation error when DATABASE_URL is missing or is not a PostgreSQL URL,
+    so misconfiguration fails at startup instead of on the first database query.
+
+    Returns:
+        Settings: The cached application settings.
+    """
+    return Settings()
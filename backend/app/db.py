@@ -1,19 +1,70 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import settings
+from app.config import get_settings
 
-# Database connection
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connection pool configuration
+pool_options = {
+    "pool_size": 20,  # Persistent connections kept in the pool
+    "max_overflow": 10,  # Extra connections allowed under burst load
+    "pool_timeout": 30,  # Seconds to wait for a free connection before erroring
+    "pool_pre_ping": True,  # Detect and replace stale connections on checkout
+    "pool_recycle": 3600,  # Recycle connections older than an hour
+}
+
+# Database connection (asyncpg driver). PgBouncer in transaction mode can hand each
+# transaction a different server connection, so prepared statements must not be cached
+# and need unique names.
+async_engine = create_async_engine(
+    str(get_settings().DATABASE_URL).replace("postgresql://", "postgresql+asyncpg://", 1),
+    connect_args={
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    },
+    **pool_options,
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Statements recorded for the innermost active count_queries() block
+_recorded_queries: ContextVar[Optional[List[str]]] = ContextVar("recorded_queries", default=None)
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    queries = _recorded_queries.get()
+    if queries is not None:
+        queries.append(statement)
+
+# Only pay for statement recording when debugging
+if get_settings().DEBUG:
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _record_query)
+
+@contextmanager
+def count_queries():
+    """
+    Record the SQL statements executed within the block (only when DEBUG is enabled).
+
+    Yields:
+        List[str]: The list the executed statements are appended to.
+    """
+    queries = []
+    token = _recorded_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _recorded_queries.reset(token)
 
 # Base for ORM models
 Base = declarative_base()
 
-# Dependency for database session
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependency for database session. Each request gets its own session; sessions are never
+# shared through a thread- or task-local registry, since a dependency's setup and teardown
+# are not pinned to the request's thread.
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,23 +1,45 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import get_settings
+from app.db import count_queries
 from app.routers import whiteboard, node, subject, connection, interaction_history, report
+from app.services.llm import aclient
+
+import logging
 
-import os
+# Configure logging once for the whole application
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the pooled OpenAI connections on shutdown
+    await aclient.close()
 
-app = FastAPI(title="Whiteboard API", version="1.0.0")
+app = FastAPI(title="Whiteboard API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:4173", "http://127.0.0.1:4173"],  # Replace with your frontend's origin(s)
     allow_credentials=True,
-    allow_methods=["*"],  # Allow all HTTP methods (GET, POST, PUT, DELETE, etc.)
-    allow_headers=["*"],  # Allow all HTTP headers
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],  # HTTP methods used by the API
+    allow_headers=["authorization", "content-type"],  # Request headers sent by the frontend
 )
 
+# Log the number of SQL statements per request in debug mode to spot N+1 regressions
+if get_settings().DEBUG:
+    @app.middleware("http")
+    async def log_query_count(request: Request, call_next):
+        with count_queries() as queries:
+            response = await call_next(request)
+        logger.info("%s %s issued %d SQL statements", request.method, request.url.path, len(queries))
+        return response
+
 # Register your routes
 app.include_router(whiteboard.router, prefix="/api/whiteboard", tags=["Whiteboard"])
 app.include_router(node.router, prefix="/api/node", tags=["Node"])
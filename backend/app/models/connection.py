@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum
+from sqlalchemy import Column, Integer, ForeignKey, String, CheckConstraint, UniqueConstraint
+from sqlalchemy.orm import relationship
 from app.db import Base
 import enum
 
@@ -21,12 +22,27 @@ class Connection(Base):
         id (int): Primary key of the connection.
         source_node_id (int): Foreign key referencing the source node's ID.
         target_node_id (int): Foreign key referencing the target node's ID.
-        type_of_connection (ConnectionType): Enum specifying the type of connection.
+        type_of_connection (str): The ConnectionType value specifying the type of connection.
             Defaults to MAIN connection.
+        source_node (Node): The node from which the connection originates.
+        target_node (Node): The node to which the connection points.
     """
     __tablename__ = "connections"
+    __table_args__ = (
+        # A node can connect to a given target only once
+        UniqueConstraint("source_node_id", "target_node_id", name="uq_source_target"),
+        # Stored as plain strings rather than a native enum type
+        CheckConstraint(
+            "type_of_connection IN ('main_connection', 'sub_connection')",
+            name="ck_connections_type_of_connection",
+        ),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     source_node_id = Column(Integer, ForeignKey("nodes.id"), nullable=False)
     target_node_id = Column(Integer, ForeignKey("nodes.id"), nullable=False)
-    type_of_connection = Column(Enum(ConnectionType), default=ConnectionType.MAIN)
+    type_of_connection = Column(String(32), nullable=False, default=ConnectionType.MAIN.value)
+
+    # Relationships
+    source_node = relationship("Node", foreign_keys=[source_node_id], back_populates="connections")
+    target_node = relationship("Node", foreign_keys=[target_node_id], back_populates="connected_from")
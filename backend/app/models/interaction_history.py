@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -18,8 +18,12 @@ class InteractionHistory(Base):
         node (Node): Relationship to the Node model, representing the node to which the interaction belongs.
     """
     __tablename__ = "interaction_history"
+    __table_args__ = (
+        # Serves "interactions of a node in insertion order" with a single index scan
+        Index("ix_interaction_node_time", "node_id", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     node_id = Column(Integer, ForeignKey("nodes.id"), nullable=False)
     role = Column(String, nullable=False)  # Role can be 'user' or 'assistant'
     content = Column(Text, nullable=False)  # Message content
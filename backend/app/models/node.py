@@ -19,12 +19,13 @@ class Node(Base):
         position (dict): A JSON object representing the node's position with x and y coordinates.
         connections (list[Connection]): List of connections where this node is the source.
         connected_from (list[Connection]): List of connections where this node is the target.
-        interaction_history (list[InteractionHistory]): List of interaction history records for this node.
+        interaction_history (list[InteractionHistory]): List of interaction history records for this node,
+            in insertion order.
         whiteboard (Whiteboard): The whiteboard to which this node belongs.
     """
     __tablename__ = "nodes"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     whiteboard_id = Column(Integer, ForeignKey("whiteboards.id"))
     name = Column(String, default="New Node")
     prompt = Column(String)
@@ -36,16 +37,17 @@ class Node(Base):
     connections = relationship(
         "Connection",
         foreign_keys="[Connection.source_node_id]",
-        backref="source_node",
+        back_populates="source_node",
     )
     connected_from = relationship(
         "Connection",
         foreign_keys="[Connection.target_node_id]",
-        backref="target_node",
+        back_populates="target_node",
     )
     interaction_history = relationship(
         "InteractionHistory",
         back_populates="node",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="InteractionHistory.id"
     )
     whiteboard = relationship("Whiteboard", back_populates="nodes")
@@ -21,7 +21,7 @@ class Report(Base):
     """
     __tablename__ = "reports"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     whiteboard_id = Column(Integer, ForeignKey("whiteboards.id"), nullable=False)
     title = Column(String, nullable=False)  # Report title
     introduction = Column(Text, nullable=True)  # LLM-generated introduction
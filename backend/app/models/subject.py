@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -18,8 +18,11 @@ class Subject(Base):
         whiteboard (Whiteboard): Relationship to the associated whiteboard.
     """
     __tablename__ = "subjects"
+    __table_args__ = (
+        UniqueConstraint("whiteboard_id", name="uq_subject_whiteboard"),  # One subject per whiteboard
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     whiteboard_id = Column(Integer, ForeignKey("whiteboards.id"), nullable=False)  # Foreign key to Whiteboard
     name = Column(String, nullable=False)
     summary = Column(String, nullable=True)  # Refined summary provided by the LLM
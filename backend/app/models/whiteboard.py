@@ -1,6 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, func
 from sqlalchemy.orm import relationship
-from datetime import datetime
 from app.db import Base
 from app.models.report import Report
 
@@ -17,17 +16,19 @@ class Whiteboard(Base):
         scale (float): Scale factor for zoom level, defaulting to 1.0.
         created_at (datetime): Timestamp when the whiteboard was created.
         updated_at (datetime): Timestamp when the whiteboard was last updated. Automatically updates on modification.
+        topology_version (int): Counter bumped whenever a node or connection is added or removed.
         nodes (list[Node]): A list of Node objects associated with this whiteboard.
         subjects (list[Subject]): A list of Subject objects associated with this whiteboard.
         reports (list[Report]): A list of Report objects associated with this whiteboard.
     """
     __tablename__ = "whiteboards"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     scale = Column(Float, default=1.0)  # Scale for zoom level
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())  # Evaluated by the database
+    topology_version = Column(Integer, nullable=False, default=0, server_default="0")  # Invalidates cached node groups
 
     nodes = relationship("Node", back_populates="whiteboard")
     subjects = relationship("Subject", back_populates="whiteboard")
@@ -1,42 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
 from app.models.connection import Connection
+from app.models.node import Node
+from app.schemas.node import ConnectionResponse
+from app.services.topology import bump_topology_version
 from typing import List
 
 router = APIRouter()
 
-@router.get("/", response_model=List[dict])
-def get_all_connections(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[ConnectionResponse])
+async def get_all_connections(db: AsyncSession = Depends(get_db)):
     """
     Retrieve all connection records from the database.
 
     This endpoint queries the database for all Connection records and returns a list
-    of dictionaries containing connection details, including the connection ID,
-    source node ID, target node ID, and the type of connection.
+    of connections, including the connection ID, source node ID, target node ID,
+    and the type of connection.
 
     Args:
-        db (Session): The SQLAlchemy database session dependency.
+        db (AsyncSession): The SQLAlchemy async database session dependency.
 
     Returns:
-        List[dict]: A list of dictionaries, each representing a connection.
-                    Returns an empty list if no connections are found.
+        List[ConnectionResponse]: A list of connections.
+                                  Returns an empty list if no connections are found.
     """
-    connections = db.query(Connection).all()
-    if not connections:
-        return []
-    return [
-        {
-            "id": connection.id,
-            "source_node_id": connection.source_node_id,
-            "target_node_id": connection.target_node_id,
-            "type_of_connection": connection.type_of_connection.value,
-        }
-        for connection in connections
-    ]
+    # Select only the serialized columns so rows come back as plain mappings, not ORM objects
+    rows = (await db.execute(select(
+        Connection.id,
+        Connection.source_node_id,
+        Connection.target_node_id,
+        Connection.type_of_connection,
+    ))).mappings().all()
+    return rows
 
 @router.delete("/{connection_id}", response_model=dict)
-def delete_connection(connection_id: int, db: Session = Depends(get_db)):
+async def delete_connection(connection_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a connection from the database by its ID.
 
@@ -45,17 +45,20 @@ def delete_connection(connection_id: int, db: Session = Depends(get_db)):
 
     Args:
         connection_id (int): The unique identifier of the connection to delete.
-        db (Session): The SQLAlchemy database session dependency.
+        db (AsyncSession): The SQLAlchemy async database session dependency.
 
     Returns:
         dict: A dictionary containing a success message and the ID of the deleted connection.
     """
-    connection = db.query(Connection).filter(Connection.id == connection_id).first()
+    connection = await db.scalar(select(Connection).where(Connection.id == connection_id))
 
     if not connection:
         raise HTTPException(status_code=404, detail="Connection not found")
 
-    db.delete(connection)
-    db.commit()
+    await db.delete(connection)
+    await bump_topology_version(
+        db, select(Node.whiteboard_id).where(Node.id == connection.source_node_id).scalar_subquery()
+    )
+    await db.commit()
 
     return {"message": "Connection deleted successfully", "id": connection_id}
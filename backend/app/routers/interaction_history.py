@@ -1,19 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from app.db import get_db
+import json
+from typing import Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Body, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import AsyncSessionLocal, get_db
 from app.models.node import Node
 from app.models.subject import Subject
 from app.models.connection import Connection
 from app.models.interaction_history import InteractionHistory
 from app.services.llm import LLMHelper
+from app.services.streaming import until_disconnected
 
 router = APIRouter()
 
+async def build_full_prompt(db: AsyncSession, node_id: int, prompt: str) -> Tuple[Optional[str], str, str]:
+    """
+    Combine a user prompt with its node's subject summary and the relevant context of connected nodes.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session dependency for database access.
+        node_id (int): The ID of the node to which the prompt is sent.
+        prompt (str): The user's prompt to be processed.
+
+    Returns:
+        Tuple[Optional[str], str, str]: The subject summary (if any), the relevant context extracted
+            from connected nodes, and the prompt to send to the LLM.
+
+    Raises:
+        HTTPException: If the node does not exist (404).
+    """
+    # Check if the node exists
+    node = await db.get(Node, node_id)
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    # Fetch the associated subject summary
+    subject_summary = None
+    if node.subject_id:
+        subject = await db.get(Subject, node.subject_id)
+        subject_summary = subject.summary if subject and subject.summary else ""
+
+    # Collect the interaction history of all nodes this node connects to, in one query
+    interactions = (await db.execute(
+        select(InteractionHistory.node_id, InteractionHistory.role, InteractionHistory.content)
+        .join(Connection, Connection.target_node_id == InteractionHistory.node_id)
+        .where(Connection.source_node_id == node_id)
+        .order_by(Connection.id, InteractionHistory.id)
+    )).mappings().all()
+
+    # Format the interactions for relevance checking
+    context_data = [dict(interaction) for interaction in interactions]
+
+    # Find the most helpful information from the context using the LLM helper
+    relevant_context = await LLMHelper.aextract_relevant_context(prompt, context_data)
+
+    # Combine the prompt with the most relevant context and subject summary
+    full_prompt = f"User prompt: {prompt}\n\n"
+    if subject_summary:
+        full_prompt += f"Subject Summary:\n{subject_summary}\n\n"
+    full_prompt += f"Helpful context:\n{relevant_context}"
+
+    return subject_summary, relevant_context, full_prompt
+
 @router.post("/send-prompt", response_model=dict)
-def send_prompt(
+async def send_prompt(
     node_id: int = Body(...),
     prompt: str = Body(..., embed=True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Send a user prompt to the LLM and generate a response based on relevant context.
@@ -33,7 +87,7 @@ def send_prompt(
     Args:
         node_id (int): The ID of the node to which the prompt is sent.
         prompt (str): The user's prompt to be processed.
-        db (Session): SQLAlchemy session dependency for database access.
+        db (AsyncSession): SQLAlchemy async session dependency for database access.
 
     Returns:
         dict: A dictionary containing:
@@ -45,45 +99,7 @@ def send_prompt(
     Raises:
         HTTPException: If the node does not exist (404) or if the LLM fails to generate a response (500).
     """
-    # Check if the node exists
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
-
-    # Fetch the associated subject summary
-    subject_summary = None
-    if node.subject_id:
-        subject = db.query(Subject).filter(Subject.id == node.subject_id).first()
-        subject_summary = subject.summary if subject and subject.summary else ""
-
-    # Fetch all nodes connected to this node
-    connected_nodes = (
-        db.query(Node)
-        .join(Connection, Connection.target_node_id == Node.id)
-        .filter(Connection.source_node_id == node_id)
-        .all()
-    )
-
-    # Collect interaction history from the connected nodes
-    all_interactions = []
-    for connected_node in connected_nodes:
-        interactions = db.query(InteractionHistory).filter(InteractionHistory.node_id == connected_node.id).all()
-        all_interactions.extend(interactions)
-
-    # Format the interactions for relevance checking
-    context_data = [
-        {"node_id": interaction.node_id, "role": interaction.role, "content": interaction.content}
-        for interaction in all_interactions
-    ]
-
-    # Find the most helpful information from the context using the LLM helper
-    relevant_context = LLMHelper.extract_relevant_context(prompt, context_data)
-
-    # Combine the prompt with the most relevant context and subject summary
-    full_prompt = f"User prompt: {prompt}\n\n"
-    if subject_summary:
-        full_prompt += f"Subject Summary:\n{subject_summary}\n\n"
-    full_prompt += f"Helpful context:\n{relevant_context}"
+    subject_summary, relevant_context, full_prompt = await build_full_prompt(db, node_id, prompt)
 
     # Save user interaction to database
     user_interaction = InteractionHistory(
@@ -92,10 +108,10 @@ def send_prompt(
         content=prompt
     )
     db.add(user_interaction)
-    db.commit()
+    await db.commit()
 
     # Send refined prompt to LLM to generate a response
-    llm_response = LLMHelper.generate_response(full_prompt)
+    llm_response = await LLMHelper.agenerate_response(full_prompt)
     if not llm_response:
         raise HTTPException(status_code=500, detail="Failed to generate response from LLM")
 
@@ -106,8 +122,7 @@ def send_prompt(
         content=llm_response
     )
     db.add(assistant_interaction)
-    db.commit()
-    db.refresh(assistant_interaction)
+    await db.commit()
 
     return {
         "user_prompt": prompt,
@@ -115,3 +130,81 @@ def send_prompt(
         "context_used": relevant_context,
         "llm_response": llm_response
     }
+
+@router.post("/send-prompt/stream")
+async def stream_prompt(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    node_id: int = Body(...),
+    prompt: str = Body(..., embed=True),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Send a user prompt to the LLM like send_prompt, streaming the response as it is generated.
+
+    The response is a Server-Sent Events stream. A "context" event carrying the user prompt, subject
+    summary and context used comes first, then one message event per chunk of the LLM response as
+    {"chunk": ...}, and an "end" event once the response is complete. While no chunk arrives, a
+    keep-alive comment is sent every few seconds. If the client disconnects, generation stops and
+    nothing more is saved. If generation fails or yields no text, an "error" event carrying a
+    detail is sent instead of the "end" event and no response is saved. The user's prompt is saved
+    before streaming starts and the assistant response after the stream finishes.
+
+    Args:
+        request (Request): The incoming request, used to detect a client disconnect.
+        background_tasks (BackgroundTasks): Used to save the response once it has been streamed.
+        node_id (int): The ID of the node to which the prompt is sent.
+        prompt (str): The user's prompt to be processed.
+        db (AsyncSession): SQLAlchemy async session dependency for database access.
+
+    Returns:
+        StreamingResponse: The event stream of the LLM response.
+
+    Raises:
+        HTTPException: If the node does not exist (404).
+    """
+    subject_summary, relevant_context, full_prompt = await build_full_prompt(db, node_id, prompt)
+
+    # Save user interaction to database
+    db.add(InteractionHistory(node_id=node_id, role="user", content=prompt))
+    await db.commit()
+
+    answer = {}
+
+    def event(data: dict, name: Optional[str] = None) -> str:
+        return (f"event: {name}\n" if name else "") + f"data: {json.dumps(data)}\n\n"
+
+    async def events():
+        yield event(
+            {"user_prompt": prompt, "subject_summary": subject_summary, "context_used": relevant_context},
+            "context",
+        )
+        chunks = []
+        try:
+            async for chunk in until_disconnected(request, LLMHelper.astream_response(full_prompt)):
+                if chunk is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                chunks.append(chunk)
+                yield event({"chunk": chunk})
+        except Exception:
+            yield event({"detail": "Failed to generate response from LLM"}, "error")
+            return
+        if await request.is_disconnected():
+            return
+        content = "".join(chunks).strip()
+        if not content:
+            yield event({"detail": "Failed to generate response from LLM"}, "error")
+            return
+        answer["content"] = content
+        yield event({}, "end")
+
+    async def save_response():
+        if not answer.get("content"):
+            return
+        async with AsyncSessionLocal() as session:
+            session.add(InteractionHistory(node_id=node_id, role="assistant", content=answer["content"]))
+            await session.commit()
+
+    background_tasks.add_task(save_response)
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -1,5 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, raiseload
+from app.config import get_settings
 from app.db import get_db
 from app.models.node import Node
 from app.models.connection import Connection, ConnectionType
@@ -7,58 +11,133 @@ from app.models.interaction_history import InteractionHistory
 from app.schemas.node import NodeCreate, NodeResponse
 from typing import List
 from app.services.llm import LLMHelper
+from app.services.topology import bump_topology_version
 
 router = APIRouter()
 
+
+def node_response_options() -> list:
+    """
+    Build the loader options needed to serialize a NodeResponse.
+
+    The relationships exposed by NodeResponse are eagerly loaded with one SELECT
+    each, regardless of the number of nodes. In debug mode any other relationship
+    access raises instead of silently lazy loading.
+
+    Returns:
+        list: Loader options to pass to Select.options().
+    """
+    options = [
+        selectinload(Node.connections),
+        selectinload(Node.interaction_history),
+    ]
+    if get_settings().DEBUG:
+        options.append(raiseload("*"))
+    return options
+
+
+async def get_node_or_404(db: AsyncSession, node_id: int, options: list = ()) -> Node:
+    """
+    Retrieve a node by its ID through the session's identity map.
+
+    Session.get() returns the node already loaded in this session without emitting a
+    SELECT, so repeated lookups of the same node within a request hit the database once.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async session to query.
+        node_id (int): The ID of the node to retrieve.
+        options (list, optional): Loader options applied when the node has to be loaded.
+
+    Returns:
+        Node: The node matching the provided ID.
+
+    Raises:
+        HTTPException: If the node is not found.
+    """
+    node = await db.get(Node, node_id, options=options)
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return node
+
+
+async def update_node_or_404(db: AsyncSession, node_id: int, **values) -> Node:
+    """
+    Update a node's columns and load it for a NodeResponse in a single statement.
+
+    The existence check is folded into the UPDATE itself: the updated row is read back
+    through RETURNING, and no row coming back means the node does not exist.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async session to execute the update with.
+        node_id (int): The ID of the node to update.
+        **values: The column values to set on the node.
+
+    Returns:
+        Node: The updated node.
+
+    Raises:
+        HTTPException: If the node is not found.
+    """
+    node = await db.scalar(
+        update(Node)
+        .where(Node.id == node_id)
+        .values(**values)
+        .returning(Node)
+        .options(*node_response_options())
+    )
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+    await db.commit()
+    return node
+
+
 @router.post("/", response_model=NodeResponse)
-def create_node(node: NodeCreate, db: Session = Depends(get_db)):
+async def create_node(node: NodeCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new node and add an initial assistant interaction.
 
-    This endpoint creates a new node in the database using the provided details,
-    commits it to the database, and then adds an initial interaction from the assistant
-    to the node's interaction history.
+    This endpoint creates a new node in the database using the provided details
+    and adds an initial interaction from the assistant to the node's interaction
+    history, committing both in a single transaction.
 
     Args:
         node (NodeCreate): The details of the node to be created.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         NodeResponse: The newly created node.
     """
-    # Create the new node
+    # Create the first interaction of the interaction history
+    first_interaction = InteractionHistory(
+        role="assistant",
+        content="How can I help?"
+    )
+
+    # Create the new node; the interaction is inserted in the same flush
     new_node = Node(
         whiteboard_id=node.whiteboard_id,
         name=node.name,
         prompt=node.prompt,
         subject_id=node.subject_id,
-        position=node.position
+        position=node.position,
+        interaction_history=[first_interaction],
+        connections=[]
     )
     db.add(new_node)
-    db.commit()
-    db.refresh(new_node)
-
-    # Add the first interaction to the interaction history
-    first_interaction = InteractionHistory(
-        node_id=new_node.id,
-        role="assistant",
-        content="How can I help?"
-    )
-    db.add(first_interaction)
-    db.commit()
-    db.refresh(first_interaction)
+    await bump_topology_version(db, node.whiteboard_id)
+    await db.commit()
 
     return new_node
 
 
 @router.get("/{node_id}", response_model=NodeResponse)
-def get_node(node_id: int, db: Session = Depends(get_db)):
+async def get_node(node_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieve a node by its ID.
 
     Args:
         node_id (int): The ID of the node to retrieve.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         NodeResponse: The node matching the provided ID.
@@ -66,29 +145,27 @@ def get_node(node_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the node is not found.
     """
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
+    node = await get_node_or_404(db, node_id, node_response_options())
     return node
 
 
 @router.get("/", response_model=List[NodeResponse])
-def get_all_nodes(db: Session = Depends(get_db)):
+async def get_all_nodes(db: AsyncSession = Depends(get_db)):
     """
     Retrieve all nodes from the database.
 
     Args:
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         List[NodeResponse]: A list of all nodes.
     """
-    nodes = db.query(Node).all()
+    nodes = (await db.scalars(select(Node).options(*node_response_options()))).all()
     return nodes
 
 
 @router.put("/{node_id}/position", response_model=NodeResponse)
-def update_node_position(node_id: int, position: dict, db: Session = Depends(get_db)):
+async def update_node_position(node_id: int, position: dict, db: AsyncSession = Depends(get_db)):
     """
     Update the position of a node.
 
@@ -97,7 +174,7 @@ def update_node_position(node_id: int, position: dict, db: Session = Depends(get
     Args:
         node_id (int): The ID of the node to update.
         position (dict): A dictionary with keys 'x' and 'y' representing the new position.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         NodeResponse: The updated node.
@@ -105,27 +182,20 @@ def update_node_position(node_id: int, position: dict, db: Session = Depends(get
     Raises:
         HTTPException: If the node is not found or if the position format is invalid.
     """
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
-    
     # Validate position format
     if not isinstance(position, dict) or "x" not in position or "y" not in position:
         raise HTTPException(status_code=400, detail="Position must be a dictionary with 'x' and 'y' keys.")
 
     # Update position
-    node.position = position
-    db.commit()
-    db.refresh(node)
-    return node
+    return await update_node_or_404(db, node_id, position=position)
 
 
 @router.post("/{node_id}/connect", response_model=dict)
-def connect_node(
+async def connect_node(
     node_id: int, 
     target_node_id: int, 
     type_of_connection: ConnectionType, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Connect a node to another node by creating a new connection.
@@ -137,7 +207,7 @@ def connect_node(
         node_id (int): The ID of the source node.
         target_node_id (int): The ID of the target node.
         type_of_connection (ConnectionType): The type of connection to establish.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         dict: A dictionary containing a success message and details of the created connection.
@@ -146,37 +216,34 @@ def connect_node(
         HTTPException: If the source or target node is not found, if a node attempts to connect to itself,
                        or if the connection already exists.
     """
-    # Validate source node
-    source_node = db.query(Node).filter(Node.id == node_id).first()
-    if not source_node:
+    # Validate source and target nodes with a single query on their IDs
+    whiteboard_ids = dict((await db.execute(
+        select(Node.id, Node.whiteboard_id).where(Node.id.in_([node_id, target_node_id]))
+    )).all())
+    found_ids = whiteboard_ids.keys()
+    if node_id not in found_ids:
         raise HTTPException(status_code=404, detail="Source node not found")
-
-    # Validate target node
-    target_node = db.query(Node).filter(Node.id == target_node_id).first()
-    if not target_node:
+    if target_node_id not in found_ids:
         raise HTTPException(status_code=404, detail="Target node not found")
 
     # Ensure the source node and target node are not the same
     if node_id == target_node_id:
         raise HTTPException(status_code=400, detail="A node cannot connect to itself")
 
-    # Check if the connection already exists
-    existing_connection = db.query(Connection).filter(
-        Connection.source_node_id == node_id,
-        Connection.target_node_id == target_node_id
-    ).first()
-    if existing_connection:
-        raise HTTPException(status_code=400, detail="Connection already exists")
-
-    # Create a new connection for the source node
+    # Create a new connection for the source node; the unique constraint on
+    # (source_node_id, target_node_id) rejects connections that already exist
     new_connection = Connection(
         source_node_id=node_id,
         target_node_id=target_node_id,
-        type_of_connection=type_of_connection
+        type_of_connection=type_of_connection.value
     )
     db.add(new_connection)
-    db.commit()
-    db.refresh(new_connection)
+    await bump_topology_version(db, whiteboard_ids[node_id])
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Connection already exists")
 
     return {
         "message": "Connections created successfully",
@@ -185,14 +252,14 @@ def connect_node(
                 "id": new_connection.id,
                 "source_node_id": new_connection.source_node_id,
                 "target_node_id": new_connection.target_node_id,
-                "type_of_connection": new_connection.type_of_connection.value
+                "type_of_connection": new_connection.type_of_connection
             }
         ]
     }
 
 
 @router.delete("/{node_id}", response_model=dict)
-def delete_node(node_id: int, db: Session = Depends(get_db)):
+async def delete_node(node_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a node and all its associated connections.
 
@@ -200,7 +267,7 @@ def delete_node(node_id: int, db: Session = Depends(get_db)):
 
     Args:
         node_id (int): The ID of the node to delete.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         dict: A message confirming deletion along with the ID of the deleted node.
@@ -209,31 +276,33 @@ def delete_node(node_id: int, db: Session = Depends(get_db)):
         HTTPException: If the node is not found.
     """
     # Fetch the node
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
-
-    # Delete all connections where the node is either source or target
-    db.query(Connection).filter(
-        (Connection.source_node_id == node_id) | (Connection.target_node_id == node_id)
-    ).delete()
+    node = await get_node_or_404(db, node_id)
+
+    # Delete all connections where the node is either source or target. None of them are
+    # used afterwards, so skip synchronizing the identity map with the deleted rows.
+    await db.execute(
+        delete(Connection)
+        .where((Connection.source_node_id == node_id) | (Connection.target_node_id == node_id))
+        .execution_options(synchronize_session=False)
+    )
 
     # Delete the node
-    db.delete(node)
-    db.commit()
+    await bump_topology_version(db, node.whiteboard_id)
+    await db.delete(node)
+    await db.commit()
 
     return {"message": f"Node with ID {node_id} and its connections were successfully deleted"}
 
 
 @router.put("/{node_id}/name", response_model=NodeResponse)
-def edit_node_name(node_id: int, new_name: str, db: Session = Depends(get_db)):
+async def edit_node_name(node_id: int, new_name: str, db: AsyncSession = Depends(get_db)):
     """
     Edit the name of an existing node.
 
     Args:
         node_id (int): The ID of the node to update.
         new_name (str): The new name for the node.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         NodeResponse: The updated node with the new name.
@@ -241,25 +310,16 @@ def edit_node_name(node_id: int, new_name: str, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the node is not found.
     """
-    # Fetch the node
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
-
     # Update the name
-    node.name = new_name
-    db.commit()
-    db.refresh(node)
-
-    return node
+    return await update_node_or_404(db, node_id, name=new_name)
 
 
 @router.post("/{node_id}/interact", response_model=dict)
-def add_interaction(
+async def add_interaction(
     node_id: int,
     role: str,
     content: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Add an interaction to a node's interaction history and generate a mock assistant response.
@@ -271,7 +331,7 @@ def add_interaction(
         node_id (int): The ID of the node for the interaction.
         role (str): The role of the user initiating the interaction.
         content (str): The content of the interaction.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         dict: A dictionary containing a message and details of both the user and assistant interactions.
@@ -280,24 +340,20 @@ def add_interaction(
         HTTPException: If the node is not found.
     """
     # Validate the node
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
+    await get_node_or_404(db, node_id)
 
-    # Create and add the user's interaction
+    # Create the user's interaction
     user_interaction = InteractionHistory(node_id=node_id, role=role, content=content)
-    db.add(user_interaction)
-    db.commit()
-    db.refresh(user_interaction)
 
     # Create a mock assistant response
     mock_assistant_response = f"Mock response for: {content}"  # Replace with actual logic if needed
     assistant_interaction = InteractionHistory(node_id=node_id, role="assistant", content=mock_assistant_response)
-    db.add(assistant_interaction)
-    db.commit()
-    db.refresh(assistant_interaction)
 
-    return {
+    # Insert both interactions in a single flush to populate their IDs
+    db.add_all([user_interaction, assistant_interaction])
+    await db.flush()
+
+    response = {
         "message": "Interaction added successfully",
         "interactions": [
             {
@@ -312,10 +368,13 @@ def add_interaction(
             }
         ]
     }
+    await db.commit()
+
+    return response
 
 
 @router.post("/{node_id}/generate-summary", response_model=NodeResponse)
-def generate_node_summary(node_id: int, db: Session = Depends(get_db)):
+async def generate_node_summary(node_id: int, db: AsyncSession = Depends(get_db)):
     """
     Generate a summary and a descriptive title for a node using the LLM.
 
@@ -325,7 +384,7 @@ def generate_node_summary(node_id: int, db: Session = Depends(get_db)):
 
     Args:
         node_id (int): The ID of the node for which to generate the summary.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The SQLAlchemy async session provided by dependency injection.
 
     Returns:
         NodeResponse: The updated node with the new summary and title.
@@ -335,21 +394,21 @@ def generate_node_summary(node_id: int, db: Session = Depends(get_db)):
                        to generate a summary and title.
     """
     # Retrieve the node
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
+    node = await get_node_or_404(db, node_id, node_response_options())
 
-    # Fetch all interaction history associated with the node
-    interactions = db.query(InteractionHistory).filter(InteractionHistory.node_id == node_id).all()
+    # The interaction history was loaded along with the node
+    interactions = node.interaction_history
     
     if not interactions:
         raise HTTPException(status_code=400, detail="No interactions found for this node.")
 
     # Format the interaction history into a single string
-    interaction_text = "\n".join([f"{interaction.role}: {interaction.content}" for interaction in interactions])
+    interaction_text = "\n".join(f"{interaction.role}: {interaction.content}" for interaction in interactions)
+    # End the read transaction so no pooled connection is held while waiting on the LLM
+    await db.commit()
 
     # Generate the summary and a new title using the LLM
-    llm_response = LLMHelper.generate_summary_and_title(interaction_text)
+    llm_response = await LLMHelper.agenerate_summary_and_title(interaction_text)
 
     if not llm_response or "summary" not in llm_response or "title" not in llm_response:
         raise HTTPException(status_code=500, detail="Failed to generate summary and title.")
@@ -357,7 +416,6 @@ def generate_node_summary(node_id: int, db: Session = Depends(get_db)):
     # Save the summary and new title into the node
     node.summary = llm_response["summary"]
     node.name = llm_response["title"]
-    db.commit()
-    db.refresh(node)
+    await db.commit()
 
     return node
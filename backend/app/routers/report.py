@@ -1,166 +1,430 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db import get_db
+import asyncio
+import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from app.config import get_settings
+from app.db import AsyncSessionLocal, get_db
 from app.models.whiteboard import Whiteboard
+from app.models.connection import Connection
 from app.models.node import Node
 from app.models.subject import Subject
 from app.models.report import Report
-from app.schemas.report import ReportCreate, ReportResponse
+from app.schemas.report import ReportCreate, ReportListItem, ReportResponse
 from app.services.llm import LLMHelper
-from typing import List
-from datetime import datetime
+from app.services.streaming import until_disconnected
+from collections import OrderedDict
+from typing import AsyncIterator, Collection, List, Optional, Tuple
+from datetime import datetime, timezone
 
 router = APIRouter()
 
-@router.post("/", response_model=ReportResponse)
-def generate_report(report_data: ReportCreate, db: Session = Depends(get_db)):
-    """
-    Generate a detailed report for a given whiteboard.
+# Fixed parts of the report prompts, concatenated with the whiteboard's content
+_INTRODUCTION_PROMPT = "Create an introduction for a report summarizing the following topics:\n\n"
+_SECTION_PROMPT = "Summarize and explain the following concepts:\n\n"
+_CONCLUSION_PROMPT_START = "Based on this report:\n"
+_CONCLUSION_PROMPT_END = "\n\nWrite a strong conclusion."
 
-    This endpoint creates a report that summarizes the whiteboard by grouping 
-    nodes under subjects and structuring the content into an introduction, body sections, 
-    and a conclusion. The report is generated using an LLM for introduction, body, and conclusion.
+# Node ID groups keyed by (whiteboard_id, topology_version), most recently used last
+GROUP_CACHE_SIZE = 256
+_group_cache: "OrderedDict[Tuple[int, int], List[List[int]]]" = OrderedDict()
+
+async def build_report_prompts(db: AsyncSession, whiteboard_id: int) -> Tuple[str, List[str]]:
+    """
+    Build the introduction prompt and one body section prompt per group of connected nodes.
 
     Args:
-        report_data (ReportCreate): The data required to create a report, including the whiteboard ID.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The async SQLAlchemy session to read the whiteboard with.
+        whiteboard_id (int): The ID of the whiteboard to report on.
 
     Returns:
-        ReportResponse: The newly created report with title, introduction, body, and conclusion.
+        Tuple[str, List[str]]: The introduction prompt and the section prompts, in group order.
 
     Raises:
         HTTPException: If the whiteboard is not found or no subjects are found for the whiteboard.
     """
-    # Fetch the whiteboard
-    whiteboard = db.query(Whiteboard).filter(Whiteboard.id == report_data.whiteboard_id).first()
+    whiteboard = await db.get(Whiteboard, whiteboard_id)
     if not whiteboard:
         raise HTTPException(status_code=404, detail="Whiteboard not found")
 
-    # Fetch subjects for the whiteboard
-    subjects = db.query(Subject).filter(Subject.whiteboard_id == report_data.whiteboard_id).all()
-    if not subjects:
+    # Count the subjects and join their "name: summary" lines in SQL, without loading Subject
+    # rows; subjects with no summary yield NULL lines, which the aggregate skips
+    subject_count, subject_summaries = (await db.execute(
+        select(
+            func.count(Subject.id),
+            func.aggregate_strings(Subject.name + ": " + func.nullif(Subject.summary, ""), "\n"),
+        ).where(Subject.whiteboard_id == whiteboard_id)
+    )).one()
+    if not subject_count:
         raise HTTPException(status_code=404, detail="No subjects found for this whiteboard")
 
-    # Generate an introduction using LLM based on the subjects' summaries
-    subject_summaries = "\n".join([f"{subject.name}: {subject.summary}" for subject in subjects if subject.summary])
-    introduction_prompt = f"Create an introduction for a report summarizing the following topics:\n\n{subject_summaries}"
-    introduction = LLMHelper.generate_introduction(introduction_prompt)
+    # Build the introduction prompt from the subjects' summaries
+    introduction_prompt = _INTRODUCTION_PROMPT + (subject_summaries or "")
+
+    # Build each node's "name: summary" line in SQL, without loading Node rows; nodes with no
+    # summary yield NULL, which is skipped like the subjects above
+    node_lines = dict((await db.execute(
+        select(Node.id, Node.name + ": " + func.nullif(Node.summary, ""))
+        .where(Node.whiteboard_id == whiteboard_id)
+    )).all())
+
+    # Aggregate nodes into sections based on their relevance and connections, and build one
+    # section prompt per group. On a cache miss the nodes are read again, so a node created in
+    # between can appear in a group without a line; it is skipped like a node with no summary.
+    section_prompts = []
+    for group in await node_id_groups(db, whiteboard, node_lines.keys()):
+        lines = (node_lines.get(node_id) for node_id in group)
+        group_content = "\n".join(line for line in lines if line)
+        section_prompts.append(_SECTION_PROMPT + group_content)
+
+    return introduction_prompt, section_prompts
+
+
+def build_conclusion_prompt(introduction: str, report_body: str) -> str:
+    """
+    Build the prompt for a report's conclusion from its introduction and body.
+
+    Args:
+        introduction (str): The report's introduction.
+        report_body (str): The report's body, sections separated by blank lines.
+
+    Returns:
+        str: The conclusion prompt.
+    """
+    return "".join((_CONCLUSION_PROMPT_START, introduction or "", "\n\n", report_body, _CONCLUSION_PROMPT_END))
 
-    # Aggregate nodes into sections based on their relevance and connections
-    all_nodes = db.query(Node).filter(Node.whiteboard_id == report_data.whiteboard_id).all()
-    node_groups = group_nodes_by_relevance(all_nodes)
 
-    # Generate content for each group using LLM and compile the report body
-    sections = []
-    for group in node_groups:
-        group_content = "\n".join([f"{node.name}: {node.summary}" for node in group if node.summary])
-        section_prompt = f"Summarize and explain the following concepts:\n\n{group_content}"
-        section_text = LLMHelper.generate_body(section_prompt)
-        sections.append(section_text)
+def new_report_title() -> str:
+    """
+    Build the title for a report generated now, timestamped in UTC so it does not depend on
+    the server's local timezone.
+
+    Returns:
+        str: The report title, e.g. "Report - 15/10/2026 09:30 UTC".
+    """
+    return f"Report - {datetime.now(timezone.utc):%d/%m/%Y %H:%M} UTC"
+
+
+@router.post("/", response_model=ReportResponse)
+async def generate_report(report_data: ReportCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Generate a detailed report for a given whiteboard.
+
+    This endpoint creates a report that summarizes the whiteboard by grouping 
+    nodes under subjects and structuring the content into an introduction, body sections, 
+    and a conclusion. The report is generated using an LLM for introduction, body, and conclusion.
+    The introduction and all body sections are independent, so they are requested concurrently;
+    only the conclusion waits for them.
+
+    Args:
+        report_data (ReportCreate): The data required to create a report, including the whiteboard ID.
+        db (AsyncSession): The async SQLAlchemy session provided by dependency injection.
+
+    Returns:
+        ReportResponse: The newly created report with title, introduction, body, and conclusion.
+
+    Raises:
+        HTTPException: If the whiteboard is not found or no subjects are found for the whiteboard (404),
+                       or if the LLM fails to generate any part of the report (502).
+    """
+    introduction_prompt, section_prompts = await build_report_prompts(db, report_data.whiteboard_id)
+    # End the read transaction so no pooled connection is held while waiting on the LLM
+    await db.commit()
+
+    # Generate the introduction and the sections concurrently; sections keep the prompts' order
+    introduction, *sections = await asyncio.gather(
+        LLMHelper.agenerate_introduction(introduction_prompt),
+        *[LLMHelper.agenerate_body(prompt) for prompt in section_prompts],
+    )
+    if introduction is None or None in sections:
+        raise HTTPException(status_code=502, detail="Failed to generate report from LLM")
 
     # Combine all sections to form the body of the report
     report_body = "\n\n".join(sections)
 
     # Generate a conclusion using LLM based on the introduction and body
-    conclusion_prompt = f"Based on this report:\n{introduction}\n\n{report_body}\n\nWrite a strong conclusion."
-    conclusion = LLMHelper.generate_body(conclusion_prompt)
+    conclusion = await LLMHelper.agenerate_body(build_conclusion_prompt(introduction, report_body))
+    if conclusion is None:
+        raise HTTPException(status_code=502, detail="Failed to generate report from LLM")
 
     # Create and save the report
     new_report = Report(
         whiteboard_id=report_data.whiteboard_id,
-        title=f"Report - {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+        title=new_report_title(),
         introduction=introduction,
         body=report_body,
         conclusion=conclusion
     )
     db.add(new_report)
-    db.commit()
-    db.refresh(new_report)
+    await db.commit()
+    await db.refresh(new_report)
 
     return new_report
 
 
+@router.post("/stream")
+async def stream_report(
+    report_data: ReportCreate,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Generate a report for a given whiteboard, streaming its text as it is generated.
+
+    The response is newline-delimited JSON. Each line is {"part": ..., "chunk": ...}, where part is
+    "introduction", a section index, or "conclusion". Chunks of the introduction and of all sections
+    are interleaved as they arrive; the conclusion follows once they are complete, then a final
+    {"part": "end", "title": ...} line. The assembled report is saved after the stream finishes.
+    If the client disconnects, all generations are stopped and no report is saved. If a generation
+    fails, the others are stopped, a final {"part": "error", "detail": ...} line is sent instead of
+    the end line, and no report is saved.
+
+    Args:
+        report_data (ReportCreate): The data required to create a report, including the whiteboard ID.
+        request (Request): The incoming request, used to detect a client disconnect.
+        background_tasks (BackgroundTasks): Used to save the report once the response is sent.
+        db (AsyncSession): The async SQLAlchemy session provided by dependency injection.
+
+    Returns:
+        StreamingResponse: The NDJSON stream of report chunks.
+
+    Raises:
+        HTTPException: If the whiteboard is not found or no subjects are found for the whiteboard.
+    """
+    introduction_prompt, section_prompts = await build_report_prompts(db, report_data.whiteboard_id)
+    # End the read transaction so no pooled connection is held while waiting on the LLM
+    await db.commit()
+
+    title = new_report_title()
+    parts = {"introduction": [], "conclusion": [], **{index: [] for index in range(len(section_prompts))}}
+    # The report's text fields, filled in once the stream has finished
+    report_fields = {}
+
+    def line(**fields) -> str:
+        return json.dumps(fields) + "\n"
+
+    async def events():
+        queue = asyncio.Queue()
+
+        async def produce(part, stream: AsyncIterator[str]):
+            try:
+                async for chunk in stream:
+                    await queue.put((part, chunk))
+            except Exception as e:
+                # Hand the failure to the consumer, which stops the stream with an error line
+                await queue.put((part, e))
+            finally:
+                await queue.put((part, None))
+
+        producers = [asyncio.create_task(produce("introduction", LLMHelper.astream_introduction(introduction_prompt)))]
+        producers += [
+            asyncio.create_task(produce(index, LLMHelper.astream_body(prompt)))
+            for index, prompt in enumerate(section_prompts)
+        ]
+        async def interleaved():
+            remaining = len(producers)
+            while remaining:
+                part, chunk = await queue.get()
+                if chunk is None:
+                    remaining -= 1
+                    continue
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield part, chunk
+
+        try:
+            async for part, chunk in until_disconnected(request, interleaved(), keepalive=None):
+                parts[part].append(chunk)
+                yield line(part=part, chunk=chunk)
+        except Exception:
+            yield line(part="error", detail="Error generating report")
+            return
+        finally:
+            # Stop generating if the client went away or a generation failed
+            for producer in producers:
+                producer.cancel()
+        if await request.is_disconnected():
+            return
+
+        introduction = "".join(parts["introduction"]).strip()
+        report_body = "\n\n".join("".join(parts[index]).strip() for index in range(len(section_prompts)))
+        conclusion_stream = LLMHelper.astream_body(build_conclusion_prompt(introduction, report_body))
+        try:
+            async for chunk in until_disconnected(request, conclusion_stream, keepalive=None):
+                parts["conclusion"].append(chunk)
+                yield line(part="conclusion", chunk=chunk)
+        except Exception:
+            yield line(part="error", detail="Error generating report")
+            return
+        if await request.is_disconnected():
+            return
+
+        report_fields.update(
+            introduction=introduction, body=report_body, conclusion="".join(parts["conclusion"]).strip()
+        )
+        yield line(part="end", title=title)
+
+    async def save_report():
+        if not report_fields:
+            return
+        async with AsyncSessionLocal() as session:
+            session.add(Report(whiteboard_id=report_data.whiteboard_id, title=title, **report_fields))
+            await session.commit()
+
+    background_tasks.add_task(save_report)
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 def group_nodes_by_relevance(nodes: List[Node]) -> List[List[Node]]:
     """
     Group nodes into clusters based on their connections.
 
     Nodes with direct or indirect connections are grouped together. Each group represents 
-    a section in the final report.
+    a section in the final report. Groups are found with an iterative union-find pass over
+    the connections, so arbitrarily large connected whiteboards cannot hit the recursion limit.
 
     Args:
         nodes (List[Node]): A list of nodes to be grouped.
 
     Returns:
-        List[List[Node]]: A list of groups, where each group is a list of connected nodes.
+        List[List[Node]]: A list of groups, where each group is a list of connected nodes,
+            ordered by their first node's position in the input.
     """
     from collections import defaultdict
 
-    # Create a map of nodes by their ID for quick lookup.
-    node_map = {node.id: node for node in nodes}
-    adjacency_list = defaultdict(set)
+    parent = {node.id: node.id for node in nodes}
+    rank = dict.fromkeys(parent, 0)
 
-    # Build the adjacency list from node connections.
-    for node in nodes:
-        for connection in node.connections:
-            adjacency_list[node.id].add(connection.target_node_id)
-            adjacency_list[connection.target_node_id].add(node.id)
+    def find(node_id: int) -> int:
+        """
+        Return the representative of the node's group, compressing the path to it.
 
-    visited = set()
-    groups = []
+        Args:
+            node_id (int): The node's ID.
 
-    def dfs(node_id: int, group: List[Node]):
+        Returns:
+            int: The ID of the group's root node.
         """
-        Depth-first search to collect connected nodes.
+        root = node_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node_id] != root:
+            parent[node_id], node_id = root, parent[node_id]
+        return root
+
+    def union(a: int, b: int):
+        """
+        Merge the groups of two nodes, attaching the shallower tree under the deeper one.
 
         Args:
-            node_id (int): The current node's ID.
-            group (List[Node]): The group being built.
+            a (int): The first node's ID.
+            b (int): The second node's ID.
         """
-        if node_id in visited:
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
             return
-        visited.add(node_id)
-        group.append(node_map[node_id])
-        for neighbor in adjacency_list[node_id]:
-            dfs(neighbor, group)
+        if rank[root_a] < rank[root_b]:
+            root_a, root_b = root_b, root_a
+        parent[root_b] = root_a
+        if rank[root_a] == rank[root_b]:
+            rank[root_a] += 1
+
+    # Merge the endpoints of every connection; targets outside this node set are ignored.
+    for node in nodes:
+        for connection in node.connections:
+            if connection.target_node_id in parent:
+                union(node.id, connection.target_node_id)
 
-    # Perform DFS on each unvisited node to form groups.
+    # Bucket nodes by their group's root, preserving input order.
+    groups = defaultdict(list)
     for node in nodes:
-        if node.id not in visited:
-            group = []
-            dfs(node.id, group)
-            groups.append(group)
+        groups[find(node.id)].append(node)
 
-    return groups
+    return list(groups.values())
 
 
-@router.get("/", response_model=List[ReportResponse])
-def get_all_reports(db: Session = Depends(get_db)):
+async def node_id_groups(db: AsyncSession, whiteboard: Whiteboard, node_ids: Collection[int]) -> List[List[int]]:
     """
-    Retrieve all reports from the database.
+    Group a whiteboard's nodes like group_nodes_by_relevance, as lists of node IDs, reusing the
+    grouping computed for the same whiteboard topology.
+
+    The grouping is cached under (whiteboard_id, topology_version); the version is bumped on every
+    node or connection creation and deletion, so an unchanged graph is neither loaded nor grouped
+    again. A cached grouping that does not cover exactly the given node IDs is recomputed.
 
     Args:
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The async SQLAlchemy session to load the nodes with on a cache miss.
+        whiteboard (Whiteboard): The whiteboard whose nodes are grouped.
+        node_ids (Collection[int]): The IDs of all nodes of the whiteboard.
 
     Returns:
-        List[ReportResponse]: A list of all reports.
+        List[List[int]]: A list of groups, where each group is a list of connected node IDs.
+    """
+    key = (whiteboard.id, whiteboard.topology_version)
+    id_groups = _group_cache.get(key)
+    if id_groups is not None and sum(map(len, id_groups)) == len(node_ids) and all(
+        node_id in node_ids for group in id_groups for node_id in group
+    ):
+        _group_cache.move_to_end(key)
+        return id_groups
+
+    # Load the nodes with their connections, which is all the grouping reads: one SELECT each,
+    # regardless of the number of nodes, fetching only the ID columns the graph walk needs.
+    # In debug mode any other relationship access raises instead of lazy loading.
+    node_options = [
+        load_only(Node.id),
+        selectinload(Node.connections).load_only(Connection.source_node_id, Connection.target_node_id),
+    ]
+    if get_settings().DEBUG:
+        node_options.append(raiseload("*"))
+    nodes = (await db.scalars(
+        select(Node).where(Node.whiteboard_id == whiteboard.id).options(*node_options)
+    )).all()
+
+    id_groups = [[node.id for node in group] for group in group_nodes_by_relevance(nodes)]
+    _group_cache[key] = id_groups
+    if len(_group_cache) > GROUP_CACHE_SIZE:
+        _group_cache.popitem(last=False)
+    return id_groups
+
+
+@router.get("/", response_model=List[ReportListItem])
+async def get_all_reports(
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Retrieve a page of reports, newest first, without their text.
 
-    Raises:
-        HTTPException: If no reports are found.
+    Only the columns needed to list reports are selected; fetch a single report for its
+    introduction, body and conclusion. Pass the last ID of a page as before_id to get the next one.
+
+    Args:
+        limit (int): The maximum number of reports to return (1-200). Defaults to 50.
+        before_id (Optional[int]): Only return reports with a lower ID. Defaults to None (start from the newest).
+        db (AsyncSession): The async SQLAlchemy session provided by dependency injection.
+
+    Returns:
+        List[ReportListItem]: The page of reports; empty when there are no more.
     """
-    reports = db.query(Report).all()
-    if not reports:
-        raise HTTPException(status_code=404, detail="No reports found")
-    return reports
+    query = select(Report.id, Report.whiteboard_id, Report.title).order_by(Report.id.desc()).limit(limit)
+    if before_id is not None:
+        query = query.where(Report.id < before_id)
+    return (await db.execute(query)).mappings().all()
 
 
 @router.get("/{report_id}", response_model=ReportResponse)
-def get_report_by_id(report_id: int, db: Session = Depends(get_db)):
+async def get_report_by_id(report_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieve a single report by its ID.
 
     Args:
         report_id (int): The ID of the report to retrieve.
-        db (Session): The SQLAlchemy session provided by dependency injection.
+        db (AsyncSession): The async SQLAlchemy session provided by dependency injection.
 
     Returns:
         ReportResponse: The report corresponding to the provided ID.
@@ -168,7 +432,7 @@ def get_report_by_id(report_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the report is not found.
     """
-    report = db.query(Report).filter(Report.id == report_id).first()
+    report = await db.get(Report, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     return report
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
 from app.models.whiteboard import Whiteboard
 from app.schemas.whiteboard import WhiteboardCreate, WhiteboardResponse
@@ -8,7 +9,7 @@ from typing import Optional
 router = APIRouter()
 
 @router.post("/", response_model=WhiteboardResponse)
-def create_whiteboard(whiteboard: WhiteboardCreate, db: Session = Depends(get_db)):
+async def create_whiteboard(whiteboard: WhiteboardCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new whiteboard.
 
@@ -17,25 +18,25 @@ def create_whiteboard(whiteboard: WhiteboardCreate, db: Session = Depends(get_db
 
     Args:
         whiteboard (WhiteboardCreate): The whiteboard data, including the name.
-        db (Session): The SQLAlchemy database session dependency.
+        db (AsyncSession): The SQLAlchemy async database session dependency.
 
     Returns:
         WhiteboardResponse: The newly created whiteboard.
     """
     new_whiteboard = Whiteboard(name=whiteboard.name)
     db.add(new_whiteboard)
-    db.commit()
-    db.refresh(new_whiteboard)
+    await db.commit()
+    await db.refresh(new_whiteboard)  # Load the server-generated timestamps
     return new_whiteboard
 
 @router.get("/{whiteboard_id}", response_model=WhiteboardResponse)
-def get_whiteboard(whiteboard_id: int, db: Session = Depends(get_db)):
+async def get_whiteboard(whiteboard_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieve a whiteboard by its ID.
 
     Args:
         whiteboard_id (int): The ID of the whiteboard to retrieve.
-        db (Session): The SQLAlchemy database session dependency.
+        db (AsyncSession): The SQLAlchemy async database session dependency.
 
     Returns:
         WhiteboardResponse: The whiteboard corresponding to the provided ID.
@@ -43,17 +44,17 @@ def get_whiteboard(whiteboard_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the whiteboard is not found.
     """
-    whiteboard = db.query(Whiteboard).filter(Whiteboard.id == whiteboard_id).first()
+    whiteboard = await db.get(Whiteboard, whiteboard_id)
     if not whiteboard:
         raise HTTPException(status_code=404, detail="Whiteboard not found")
     return whiteboard
 
 @router.patch("/{whiteboard_id}/zoom")
-def update_zoom(
+async def update_zoom(
     whiteboard_id: int,
     action: Optional[str] = "custom",  # Accept custom zoom levels
     scale: Optional[float] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update the zoom level of a whiteboard.
@@ -68,7 +69,7 @@ def update_zoom(
         whiteboard_id (int): The ID of the whiteboard to update.
         action (Optional[str], optional): The zoom action ("in", "out", "reset", or "custom"). Defaults to "custom".
         scale (Optional[float], optional): The custom scale value if action is "custom". Defaults to None.
-        db (Session): The SQLAlchemy database session dependency.
+        db (AsyncSession): The SQLAlchemy async database session dependency.
 
     Returns:
         dict: A dictionary containing the whiteboard ID and the updated zoom scale.
@@ -76,21 +77,29 @@ def update_zoom(
     Raises:
         HTTPException: If the whiteboard is not found or if the provided action/scale is invalid.
     """
-    whiteboard = db.query(Whiteboard).filter(Whiteboard.id == whiteboard_id).first()
-    if not whiteboard:
-        raise HTTPException(status_code=404, detail="Whiteboard not found")
-
+    # Compute the new scale in SQL from the current one, so the read, change and write happen
+    # in a single UPDATE and concurrent zooms cannot overwrite each other
     if action == "in":
-        whiteboard.scale = min(whiteboard.scale + 0.1, 2.0)  # Max zoom level
+        zoomed = Whiteboard.scale + 0.1
+        new_scale = case((zoomed > 2.0, 2.0), else_=zoomed)  # Max zoom level
     elif action == "out":
-        whiteboard.scale = max(whiteboard.scale - 0.1, 0.5)  # Min zoom level
+        zoomed = Whiteboard.scale - 0.1
+        new_scale = case((zoomed < 0.5, 0.5), else_=zoomed)  # Min zoom level
     elif action == "reset":
-        whiteboard.scale = 1.0  # Reset zoom level
+        new_scale = 1.0  # Reset zoom level
     elif action == "custom" and scale is not None:
-        whiteboard.scale = max(min(scale, 2.0), 0.5)  # Ensure scale is within bounds
+        new_scale = max(min(scale, 2.0), 0.5)  # Ensure scale is within bounds
     else:
         raise HTTPException(status_code=400, detail="Invalid action or missing scale")
 
-    db.commit()
-    db.refresh(whiteboard)
-    return {"id": whiteboard.id, "scale": whiteboard.scale}
+    updated = (await db.execute(
+        update(Whiteboard)
+        .where(Whiteboard.id == whiteboard_id)
+        .values(scale=new_scale)
+        .returning(Whiteboard.id, Whiteboard.scale)
+    )).one_or_none()
+    if not updated:
+        raise HTTPException(status_code=404, detail="Whiteboard not found")
+
+    await db.commit()
+    return {"id": updated.id, "scale": updated.scale}
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Dict
 
 class InteractionHistoryResponse(BaseModel):
@@ -7,8 +7,7 @@ class InteractionHistoryResponse(BaseModel):
     content: str
     node_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Base schema for Connection
 class ConnectionBase(BaseModel):
@@ -26,8 +25,7 @@ class ConnectionResponse(ConnectionBase):
     id: int  # ID of the connection
     source_node_id: int  # ID of the source node
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Base schema for Node
@@ -61,7 +59,6 @@ class NodeResponse(NodeBase):
     position: dict
     summary: Optional[str]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
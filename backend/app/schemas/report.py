@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
 class ReportCreate(BaseModel):
@@ -12,5 +12,9 @@ class ReportResponse(BaseModel):
     body: Optional[str]
     conclusion: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class ReportListItem(BaseModel):
+    id: int
+    whiteboard_id: int
+    title: str
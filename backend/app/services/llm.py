@@ -9,23 +9,350 @@ Before using this module, ensure that you have set your OpenAI API key.
 """
 
 import openai
-from typing import Optional
+import asyncio
+import functools
+import hashlib
+import heapq
+import inspect
+import io
+import json
+import math
+import operator
+from array import array
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
-from openai import OpenAI
-import os
+import httpx
+import tiktoken
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from app.config import get_settings
 
-api_key = os.environ.get("OPENAI_API_KEY")
+api_key = get_settings().OPENAI_API_KEY
 
-# Initialize the OpenAI client
-client = OpenAI()
+# Initialize the OpenAI client. It keeps one pool of HTTP/2 connections for the life of the
+# process, so concurrent calls are multiplexed over warm connections instead of each paying for a
+# new TCP and TLS handshake. Rate limits (429), timeouts, connection errors and server errors are
+# retried by the SDK itself up to MAX_RETRIES times, with exponential backoff and jitter, before a
+# call gives up; each attempt has its own REQUEST_TIMEOUT.
+MAX_RETRIES = 5
+REQUEST_TIMEOUT = openai.Timeout(60.0, connect=5.0)
+http_limits = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+aclient = AsyncOpenAI(
+    api_key=api_key,
+    max_retries=MAX_RETRIES,
+    timeout=REQUEST_TIMEOUT,
+    http_client=DefaultAsyncHttpxClient(http2=True, limits=http_limits),
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging is configured by the application (see app.main); log previews of prompts and outputs
+# are cut to LOG_PREVIEW_CHARS characters and only built when INFO is enabled
 logger = logging.getLogger(__name__)
+LOG_PREVIEW_CHARS = 100
 
 # Set your OpenAI API key here
 openai.api_key = api_key
 
+# Generated texts keyed by a hash of their kind and inputs, most recently used last
+RESPONSE_CACHE_SIZE = 1024
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+
+# Model each kind of task is sent to by default; every generator takes a model argument to
+# override it. Short, simple outputs go to a smaller and faster model.
+MODEL_ROUTING = {
+    "summary": "gpt-4o-mini",
+    "title_summary": "gpt-4o-mini",
+    "context": "gpt-4o-mini",
+    "introduction": "o1-mini",
+    "body": "o1-mini",
+    "response": "gpt-4o",
+}
+
+# Near-duplicate prompts (cosine similarity of their embeddings at or above SEMANTIC_SIMILARITY)
+# reuse a cached response too. The embeddings of the last SEMANTIC_CACHE_SIZE cached responses
+# are kept per kind and generation settings, most recently used last. Only kinds whose whole
+# input is the distinguishing text use this tier: summaries and prompt responses are mostly
+# context shared between requests, so a different new text or question would still match.
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_SIMILARITY = 0.95
+SEMANTIC_CACHE_SIZE = 256
+_semantic_index: Dict[str, "OrderedDict[str, array]"] = {}
+
+# Context extraction only sends the CONTEXT_TOP_K past interactions most similar to the prompt.
+# Interaction embeddings are kept (as compact float arrays) for the last EMBEDDING_CACHE_SIZE
+# texts embedded, keyed by a hash of the text, so each interaction is embedded once.
+CONTEXT_TOP_K = 5
+EMBEDDING_CACHE_SIZE = 2048
+EMBEDDING_BATCH_SIZE = 2048  # Inputs per embeddings request, the API maximum
+_embedding_cache: "OrderedDict[str, array]" = OrderedDict()
+
+# Past interactions sent for context extraction are capped at this many tokens
+CONTEXT_TOKEN_BUDGET = 6000
+
+# Defaults for run_many: the account's requests and tokens per minute
+MAX_REQUESTS_PER_MINUTE = 3500
+MAX_TOKENS_PER_MINUTE = 150000
+
+# Futures of the async generations currently running, keyed like the response cache
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+# Instructions sent ahead of the input text, identical on every request of a kind
+SUMMARY_INSTRUCTION = "You are a summary creator..."
+INTRODUCTION_INSTRUCTION = "You are an introduction generator..."
+BODY_INSTRUCTION = "Expand the user's input into a detailed report..."
+RESPONSE_INSTRUCTION = "You are an AI assistant..."
+CONTEXT_INSTRUCTION = "Extract relevant details..."
+
+# Title and summary are requested together in a single call that answers with this JSON object
+TITLE_SUMMARY_INSTRUCTION = "Return JSON with a title of at most 5 words and a summary of the text of at most 100 words."
+TITLE_SUMMARY_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "TitleSummary",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"title": {"type": "string"}, "summary": {"type": "string"}},
+            "required": ["title", "summary"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+def _cache_key(kind: str, text: str, max_tokens: int, temperature: float, model: str) -> str:
+    return hashlib.sha256(f"{kind}\0{model}\0{max_tokens}\0{temperature}\0{text}".encode()).hexdigest()
+
+def _cache_lookup(key: str) -> Optional[str]:
+    result = _response_cache.get(key)
+    if result is not None:
+        _response_cache.move_to_end(key)
+    return result
+
+def _cache_store(key: str, result: Optional[str]):
+    if result is None:
+        return
+    _response_cache[key] = result
+    if len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+def _interaction_line(item: dict) -> str:
+    return f"- {item['role'].capitalize()}: {item['content']}\n"
+
+def _context_messages(prompt: str, context_data: list, model: str) -> List[dict]:
+    # Keep the most recent interactions that fit in the token budget, dropping the oldest first
+    lines, tokens = [], 0
+    for item in reversed(context_data):
+        line = _interaction_line(item)
+        tokens += _count_tokens(line)
+        if tokens > CONTEXT_TOKEN_BUDGET:
+            break
+        lines.append(line)
+    if len(lines) < len(context_data):
+        logger.info("Dropped %d of %d past interactions over the context budget", len(context_data) - len(lines), len(context_data))
+
+    formatted_context = io.StringIO()
+    for line in reversed(lines):
+        formatted_context.write(line)
+    return _messages(
+        model,
+        CONTEXT_INSTRUCTION,
+        f"User prompt: {prompt}\n\nPast interactions:\n{formatted_context.getvalue().rstrip()}",
+    )
+
+def _generation_params(model: str, max_tokens: int, temperature: float) -> dict:
+    # o1 models only support the default temperature, and their completion token limit also
+    # covers hidden reasoning tokens, so the small caps used here would leave no room for the
+    # answer; they are left to their own limits
+    if model.startswith("o1"):
+        return {}
+    return {"max_tokens": max_tokens, "temperature": temperature}
+
+def _messages(model: str, instruction: str, text: str) -> List[dict]:
+    # Send the instruction as the system message so its identical prefix hits OpenAI's prompt
+    # cache; o1 models do not accept system messages, so it goes first as a user message there
+    role = "user" if model.startswith("o1") else "system"
+    return [{"role": role, "content": instruction}, {"role": "user", "content": text}]
+
+@functools.lru_cache(maxsize=1)
+def _encoder() -> tiktoken.Encoding:
+    # Loading the encoding reads (and on first use downloads) its BPE ranks, so do it once
+    return tiktoken.encoding_for_model("gpt-4o")
+
+def _count_tokens(text: str) -> int:
+    return len(_encoder().encode_ordinary(text))
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+async def _aembed(text: str) -> Optional[List[float]]:
+    try:
+        response = await aclient.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    except Exception as e:
+        logger.error("Error embedding text: %s", e)
+        return None
+    return _normalize(response.data[0].embedding)
+
+def _cached_embeddings(texts: List[str]) -> Tuple[List[str], Dict[str, array]]:
+    keys = [hashlib.sha256(text.encode()).hexdigest() for text in texts]
+    found = {}
+    for key in keys:
+        if key in _embedding_cache:
+            _embedding_cache.move_to_end(key)
+            found[key] = _embedding_cache[key]
+    return keys, found
+
+def _store_embeddings(found: Dict[str, array], keys: List[str], embeddings: List[List[float]]):
+    for key, embedding in zip(keys, embeddings):
+        found[key] = _embedding_cache[key] = array("f", _normalize(embedding))
+        if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+
+def _missing(keys: List[str], texts: List[str], found: Dict[str, array]) -> Tuple[List[str], List[str]]:
+    missing = {key: text for key, text in zip(keys, texts) if key not in found}
+    return list(missing), list(missing.values())
+
+async def _aembed_many(texts: List[str]) -> Optional[List[array]]:
+    keys, found = _cached_embeddings(texts)
+    missing_keys, missing_texts = _missing(keys, texts, found)
+    try:
+        for start in range(0, len(missing_texts), EMBEDDING_BATCH_SIZE):
+            response = await aclient.embeddings.create(model=EMBEDDING_MODEL, input=missing_texts[start:start + EMBEDDING_BATCH_SIZE])
+            batch_keys = missing_keys[start:start + EMBEDDING_BATCH_SIZE]
+            _store_embeddings(found, batch_keys, [item.embedding for item in sorted(response.data, key=lambda item: item.index)])
+    except Exception as e:
+        logger.error("Error embedding texts: %s", e)
+        return None
+    return [found[key] for key in keys]
+
+def _most_similar(context_data: list, vectors: List[array], prompt_vector: array) -> list:
+    # Vectors are normalized, so their dot product is the cosine similarity
+    scores = [sum(map(operator.mul, prompt_vector, vector)) for vector in vectors]
+    top = heapq.nlargest(CONTEXT_TOP_K, range(len(context_data)), key=scores.__getitem__)
+    return [context_data[i] for i in sorted(top)]  # Back in chronological order
+
+def _semantic_lookup(index_key: str, vector: List[float], similarity: float) -> Optional[str]:
+    index = _semantic_index.get(index_key)
+    if not index:
+        return None
+    best_key, best_score = None, similarity
+    # Vectors are normalized, so their dot product is the cosine similarity
+    for key, cached_vector in list(index.items()):
+        if key not in _response_cache:
+            del index[key]  # Response evicted since
+            continue
+        score = sum(map(operator.mul, vector, cached_vector))
+        if score >= best_score:
+            best_key, best_score = key, score
+    if best_key is None:
+        return None
+    index.move_to_end(best_key)
+    return _cache_lookup(best_key)
+
+def _semantic_store(index_key: str, vector: Optional[List[float]], key: str, result: Optional[str]):
+    if vector is None or result is None:
+        return
+    index = _semantic_index.setdefault(index_key, OrderedDict())
+    index[key] = array("f", vector)
+    if len(index) > SEMANTIC_CACHE_SIZE:
+        index.popitem(last=False)
+
+async def _coalesce(kind: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Await call(), unless an identical call is already in flight, in which case await its result.
+
+    Args:
+        kind (str): The kind of call, for logging.
+        key (str): The key identifying identical calls, e.g. a response cache key.
+        call (Callable[[], Awaitable[Any]]): Makes the call when no identical one is in flight.
+
+    Returns:
+        Any: The result of the call.
+    """
+    pending = _inflight.get(key)
+    if pending is not None:
+        logger.info("Joining in-flight %s", kind)
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The leading call was cancelled (e.g. its client went away); make our own
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await call()
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        _inflight.pop(key, None)
+    future.set_result(result)
+    return result
+
+def cache_response(kind: str, similarity: Optional[float] = None):
+    """
+    Cache a text generator's successful results by a SHA-256 hash of its inputs.
+
+    Identical prompts (e.g. regenerating a report after a no-op edit) are answered from an
+    in-process LRU instead of calling the API again. Failed generations (None) are not cached.
+    Concurrent calls with the same inputs are coalesced: only the first reaches the API and the
+    others await its result.
+
+    With a similarity threshold, a prompt that misses the exact cache is embedded and answered
+    with the cached response of the closest earlier prompt of the same kind and settings, if
+    their cosine similarity reaches the threshold. The embedding call is much cheaper and faster
+    than a generation; if it fails the prompt is generated as usual.
+
+    Args:
+        kind (str): The kind of text generated, part of the cache key.
+        similarity (Optional[float]): The cosine similarity threshold for the semantic tier, or
+            None to only reuse exact matches.
+
+    Returns:
+        Callable: A decorator for async generator functions taking (text, max_tokens, temperature, model).
+    """
+    def decorator(func):
+        defaults = {
+            name: param.default for name, param in inspect.signature(func).parameters.items()
+            if name in ("max_tokens", "temperature", "model")
+        }
+
+        @functools.wraps(func)
+        async def wrapper(
+            text: str,
+            max_tokens: int = defaults["max_tokens"],
+            temperature: float = defaults["temperature"],
+            model: str = defaults["model"],
+        ):
+            key = _cache_key(kind, text, max_tokens, temperature, model)
+            cached = _cache_lookup(key)
+            if cached is not None:
+                logger.info("Using cached %s", kind)
+                return cached
+
+            index_key = f"{kind}\0{model}\0{max_tokens}\0{temperature}"
+
+            async def generate() -> Optional[str]:
+                vector = None
+                if similarity is not None:
+                    vector = await _aembed(text)
+                    if vector is not None:
+                        result = _semantic_lookup(index_key, vector, similarity)
+                        if result is not None:
+                            logger.info("Using semantically cached %s", kind)
+                            _cache_store(key, result)
+                            return result
+                result = await func(text, max_tokens, temperature, model)
+                _cache_store(key, result)
+                _semantic_store(index_key, vector, key, result)
+                return result
+
+            return await _coalesce(kind, key, generate)
+        return wrapper
+
+    return decorator
+
 class LLMHelper:
     """
     A helper class to interface with OpenAI's API for generating text-based outputs.
@@ -37,10 +364,15 @@ class LLMHelper:
       - Generate a response for a user prompt.
       - Extract relevant context from past interactions.
       - Generate both a summary and title from input text.
+
+    The generators are async (agenerate_*, aextract_relevant_context) and do not block the event
+    loop, so independent calls can be awaited concurrently; the introduction, body and response
+    also have streaming variants (astream_*) that yield the text as it is generated.
     """
 
     @staticmethod
-    def generate_summary(text: str, max_tokens: int = 50, temperature: float = 0.7) -> Optional[str]:
+    @cache_response("summary")
+    async def agenerate_summary(text: str, max_tokens: int = 50, temperature: float = 0.7, model: str = MODEL_ROUTING["summary"]) -> Optional[str]:
         """
         Generates a concise and well-formatted summary for the given text using OpenAI's API.
         
@@ -48,28 +380,30 @@ class LLMHelper:
             text (str): The text to summarize.
             max_tokens (int, optional): The maximum number of tokens for the summary. Default is 50.
             temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["summary"].
         
         Returns:
             Optional[str]: The generated summary if successful; otherwise, None.
         """
-        logger.info("Generating summary for text: %s", text[:100])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Generating summary for text: %s", text[:LOG_PREVIEW_CHARS])
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "user", "content": "You are a summary creator..."},
-                    {"role": "user", "content": text}
-                ],
+            response = await aclient.chat.completions.create(
+                model=model,
+                messages=_messages(model, SUMMARY_INSTRUCTION, text),
+                **_generation_params(model, max_tokens, temperature),
             )
             summary = response.choices[0].message.content.strip()
-            logger.info("Generated summary: %s", summary[:100])
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Generated summary: %s", summary[:LOG_PREVIEW_CHARS])
             return summary
         except Exception as e:
             logger.error("Error generating summary: %s", e)
             return None
 
     @staticmethod
-    def generate_introduction(text: str, max_tokens: int = 50, temperature: float = 0.7) -> Optional[str]:
+    @cache_response("introduction", similarity=SEMANTIC_SIMILARITY)
+    async def agenerate_introduction(text: str, max_tokens: int = 50, temperature: float = 0.7, model: str = MODEL_ROUTING["introduction"]) -> Optional[str]:
         """
         Generates an introduction for a report based on the given text using OpenAI's API.
         
@@ -77,28 +411,30 @@ class LLMHelper:
             text (str): The text to base the introduction on.
             max_tokens (int, optional): The maximum number of tokens for the introduction. Default is 50.
             temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["introduction"].
         
         Returns:
             Optional[str]: The generated introduction if successful; otherwise, None.
         """
-        logger.info("Generating introduction for text: %s", text[:100])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Generating introduction for text: %s", text[:LOG_PREVIEW_CHARS])
         try:
-            response = client.chat.completions.create(
-                model="o1-mini",
-                messages=[
-                    {"role": "user", "content": "You are an introduction generator..."},
-                    {"role": "user", "content": text}
-                ],
+            response = await aclient.chat.completions.create(
+                model=model,
+                messages=_messages(model, INTRODUCTION_INSTRUCTION, text),
+                **_generation_params(model, max_tokens, temperature),
             )
             introduction = response.choices[0].message.content.strip()
-            logger.info("Generated introduction: %s", introduction[:100])
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Generated introduction: %s", introduction[:LOG_PREVIEW_CHARS])
             return introduction
         except Exception as e:
             logger.error("Error generating introduction: %s", e)
             return None
 
     @staticmethod
-    def generate_body(text: str, max_tokens: int = 1024, temperature: float = 0.7) -> Optional[str]:
+    @cache_response("body")
+    async def agenerate_body(text: str, max_tokens: int = 1024, temperature: float = 0.7, model: str = MODEL_ROUTING["body"]) -> Optional[str]:
         """
         Generates a detailed report body based on the input text using OpenAI's API.
         
@@ -106,28 +442,157 @@ class LLMHelper:
             text (str): The text to expand into a detailed report.
             max_tokens (int, optional): The maximum number of tokens for the report body. Default is 1024.
             temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["body"].
         
         Returns:
             Optional[str]: The generated report body if successful; otherwise, None.
         """
-        logger.info("Generating report body for text: %s", text[:100])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Generating report body for text: %s", text[:LOG_PREVIEW_CHARS])
         try:
-            response = client.chat.completions.create(
-                model="o1-mini",
-                messages=[
-                    {"role": "user", "content": "Expand the user's input into a detailed report..."},
-                    {"role": "user", "content": text}
-                ],
+            response = await aclient.chat.completions.create(
+                model=model,
+                messages=_messages(model, BODY_INSTRUCTION, text),
+                **_generation_params(model, max_tokens, temperature),
             )
             body = response.choices[0].message.content.strip()
-            logger.info("Generated report body: %s", body[:100])
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Generated report body: %s", body[:LOG_PREVIEW_CHARS])
             return body
         except Exception as e:
             logger.error("Error generating report body: %s", e)
             return None
 
     @staticmethod
-    def generate_response(prompt: str, max_tokens: int = 150, temperature: float = 0.7) -> Optional[str]:
+    async def astream_introduction(text: str, max_tokens: int = 50, temperature: float = 0.7, model: str = MODEL_ROUTING["introduction"]) -> AsyncIterator[str]:
+        """
+        Streaming variant of agenerate_introduction, yielding the introduction as it is generated.
+
+        Args:
+            text (str): The text to base the introduction on.
+            max_tokens (int, optional): The maximum number of tokens for the introduction. Default is 50.
+            temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["introduction"].
+
+        Yields:
+            str: Consecutive pieces of the introduction.
+
+        Raises:
+            Exception: If the generation fails, possibly after some pieces were yielded.
+        """
+        async for chunk in LLMHelper._astream(
+            "introduction", model, INTRODUCTION_INSTRUCTION, text, max_tokens, temperature
+        ):
+            yield chunk
+
+    @staticmethod
+    async def astream_body(text: str, max_tokens: int = 1024, temperature: float = 0.7, model: str = MODEL_ROUTING["body"]) -> AsyncIterator[str]:
+        """
+        Streaming variant of agenerate_body, yielding the report body as it is generated.
+
+        Args:
+            text (str): The text to expand into a detailed report.
+            max_tokens (int, optional): The maximum number of tokens for the report body. Default is 1024.
+            temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["body"].
+
+        Yields:
+            str: Consecutive pieces of the report body.
+
+        Raises:
+            Exception: If the generation fails, possibly after some pieces were yielded.
+        """
+        async for chunk in LLMHelper._astream(
+            "body", model, BODY_INSTRUCTION, text, max_tokens, temperature
+        ):
+            yield chunk
+
+    @staticmethod
+    async def astream_response(prompt: str, max_tokens: int = 150, temperature: float = 0.7, model: str = MODEL_ROUTING["response"]) -> AsyncIterator[str]:
+        """
+        Streaming variant of agenerate_response, yielding the response as it is generated.
+
+        Args:
+            prompt (str): The user prompt to generate a response for.
+            max_tokens (int, optional): The maximum number of tokens for the response. Default is 150.
+            temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["response"].
+
+        Yields:
+            str: Consecutive pieces of the response.
+
+        Raises:
+            Exception: If the generation fails, possibly after some pieces were yielded.
+        """
+        async for chunk in LLMHelper._astream(
+            "response", model, RESPONSE_INSTRUCTION, prompt, max_tokens, temperature
+        ):
+            yield chunk
+
+    @staticmethod
+    async def _astream(
+        kind: str, model: str, instruction: str, text: str, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
+        """
+        Streams a chat completion, sharing the response cache with the non-streaming generators.
+
+        A cached text is yielded in one piece; a fully streamed, non-empty text is added to the
+        cache. Closing the generator early aborts the completion, so no further tokens are
+        generated or billed.
+
+        Args:
+            kind (str): The kind of text generated, part of the cache key.
+            model (str): The model to generate with.
+            instruction (str): The instruction message sent before the text.
+            text (str): The input text.
+            max_tokens (int): The maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Yields:
+            str: Consecutive pieces of the generated text.
+
+        Raises:
+            Exception: If the completion fails, so callers can tell a failed stream from a
+                finished one; a partial text is not cached.
+        """
+        key = _cache_key(kind, text, max_tokens, temperature, model)
+        cached = _cache_lookup(key)
+        if cached is not None:
+            logger.info("Using cached %s", kind)
+            yield cached
+            return
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Streaming %s for text: %s", kind, text[:LOG_PREVIEW_CHARS])
+        chunks = []
+        stream = None
+        try:
+            stream = await aclient.chat.completions.create(
+                model=model,
+                messages=_messages(model, instruction, text),
+                **_generation_params(model, max_tokens, temperature),
+                stream=True,
+            )
+            async for event in stream:
+                delta = event.choices[0].delta.content if event.choices else None
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        except Exception as e:
+            logger.error("Error streaming %s: %s", kind, e)
+            raise
+        finally:
+            # Closing the response early (the consumer went away) stops the generation server-side
+            if stream is not None:
+                await stream.close()
+        text = "".join(chunks).strip()
+        # An empty completion is a failure, not an answer to reuse
+        if text:
+            _cache_store(key, text)
+
+    @staticmethod
+    @cache_response("response")
+    async def agenerate_response(prompt: str, max_tokens: int = 150, temperature: float = 0.7, model: str = MODEL_ROUTING["response"]) -> Optional[str]:
         """
         Generates a response to a user prompt using OpenAI's API.
         
@@ -135,91 +600,200 @@ class LLMHelper:
             prompt (str): The user prompt to generate a response for.
             max_tokens (int, optional): The maximum number of tokens for the response. Default is 150.
             temperature (float, optional): Sampling temperature for generation. Default is 0.7.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["response"].
         
         Returns:
             Optional[str]: The generated response if successful; otherwise, None.
         """
-        logger.info("Generating response for prompt: %s", prompt[:100])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Generating response for prompt: %s", prompt[:LOG_PREVIEW_CHARS])
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "user", "content": "You are an AI assistant..."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = await aclient.chat.completions.create(
+                model=model,
+                messages=_messages(model, RESPONSE_INSTRUCTION, prompt),
+                **_generation_params(model, max_tokens, temperature),
             )
             response_text = response.choices[0].message.content.strip()
-            logger.info("Generated response: %s", response_text[:100])
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Generated response: %s", response_text[:LOG_PREVIEW_CHARS])
             return response_text
         except Exception as e:
             logger.error("Error generating response: %s", e)
             return None
 
     @staticmethod
-    def extract_relevant_context(prompt: str, context_data: list) -> str:
+    async def aextract_relevant_context(prompt: str, context_data: list, model: str = MODEL_ROUTING["context"]) -> str:
         """
         Extracts relevant context from past interactions using OpenAI's API.
+
+        Only the CONTEXT_TOP_K interactions whose embeddings are most similar to the prompt's are sent.
         
         Args:
             prompt (str): The current user prompt.
             context_data (list): A list of dictionaries containing past interaction data with keys 'role' and 'content'.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["context"].
         
         Returns:
             str: The extracted relevant context if successful; otherwise, a default message indicating no context found.
         """
-        logger.info("Extracting relevant context for prompt: %s", prompt[:100])
-        formatted_context = "\n".join([f"- {item['role'].capitalize()}: {item['content']}" for item in context_data])
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "user", "content": "Extract relevant details..."},
-                    {"role": "user", "content": f"User prompt: {prompt}\n\nPast interactions:\n{formatted_context}"}
-                ],
-            )
-            relevant_context = response.choices[0].message.content.strip()
-            logger.info("Extracted relevant context: %s", relevant_context[:100])
-            return relevant_context
-        except Exception as e:
-            logger.error("Error extracting relevant context: %s", e)
-            return "No relevant context found."
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Extracting relevant context for prompt: %s", prompt[:LOG_PREVIEW_CHARS])
+        # Only the past interactions most similar to the prompt are sent; all of them if embedding fails
+        if len(context_data) > CONTEXT_TOP_K:
+            vectors = await _aembed_many([prompt] + [_interaction_line(item) for item in context_data])
+            if vectors is not None:
+                context_data = _most_similar(context_data, vectors[1:], vectors[0])
+        messages = _context_messages(prompt, context_data, model)
+
+        async def extract() -> str:
+            try:
+                response = await aclient.chat.completions.create(model=model, messages=messages)
+                relevant_context = response.choices[0].message.content.strip()
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Extracted relevant context: %s", relevant_context[:LOG_PREVIEW_CHARS])
+                return relevant_context
+            except Exception as e:
+                logger.error("Error extracting relevant context: %s", e)
+                return "No relevant context found."
+
+        # Identical concurrent extractions share one call
+        return await _coalesce("context", _cache_key("context", json.dumps(messages), 0, 0, model), extract)
 
     @staticmethod
-    def generate_summary_and_title(text: str, max_tokens: int = 200, temperature: float = 0.5) -> Optional[dict]:
+    async def agenerate_summary_and_title(text: str, max_tokens: int = 200, temperature: float = 0.5, model: str = MODEL_ROUTING["title_summary"]) -> Optional[dict]:
         """
         Generates both a summary and a title for the given text using OpenAI's API.
         
-        The response is expected to contain a title on the first line, followed by the summary in the subsequent lines.
+        Both are requested in a single call whose response is a JSON object with "title" and "summary" keys.
         
         Args:
             text (str): The text to generate a summary and title for.
             max_tokens (int, optional): The maximum number of tokens for the output. Default is 200.
             temperature (float, optional): Sampling temperature for generation. Default is 0.5.
+            model (str, optional): The model to generate with. Default is MODEL_ROUTING["title_summary"].
         
         Returns:
             Optional[dict]: A dictionary with keys "title" and "summary" if successful; otherwise, None.
         """
-        logger.info("Generating summary and title for text: %s", text[:1000])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Generating summary and title for text: %s", text[:LOG_PREVIEW_CHARS])
+
+        async def generate() -> Optional[dict]:
+            try:
+                response = await aclient.chat.completions.create(
+                    model=model,
+                    response_format=TITLE_SUMMARY_FORMAT,
+                    messages=_messages(model, TITLE_SUMMARY_INSTRUCTION, text),
+                    **_generation_params(model, max_tokens, temperature),
+                )
+                result = json.loads(response.choices[0].message.content)
+                logger.info("Generated title: %s", result["title"])
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Generated summary: %s", result["summary"][:LOG_PREVIEW_CHARS])
+                return result
+            except Exception as e:
+                logger.error("Error generating summary and title: %s", e)
+                return None
+
+        # Identical concurrent requests share one call
+        return await _coalesce(
+            "summary and title", _cache_key("title_summary", text, max_tokens, temperature, model), generate
+        )
+
+    @staticmethod
+    async def run_many(
+        texts: List[str],
+        method: str = "agenerate_summary",
+        max_rpm: int = MAX_REQUESTS_PER_MINUTE,
+        max_tpm: int = MAX_TOKENS_PER_MINUTE,
+        checkpoint: Optional[str] = None,
+    ) -> List[Optional[str]]:
+        """
+        Runs one of the async generators over many texts concurrently, within the account's rate limits.
+
+        Requests are dispatched as soon as the per-minute request and token budgets allow, instead of
+        one at a time, so bulk jobs are bounded by the rate limits rather than by request latency.
+        Transient API errors are already retried by the client (see MAX_RETRIES), so an item that still
+        fails is not tried again. Each distinct text is generated once.
+
+        Args:
+            texts (List[str]): The texts to process.
+            method (str, optional): The name of the LLMHelper generator to call with each text. Default is
+                "agenerate_summary".
+            max_rpm (int, optional): The maximum number of requests per minute. Default is MAX_REQUESTS_PER_MINUTE.
+            max_tpm (int, optional): The maximum number of tokens (prompt and completion) per minute. Default is
+                MAX_TOKENS_PER_MINUTE.
+            checkpoint (Optional[str], optional): Path of a JSONL file that finished results are appended to,
+                keyed by a hash of the method and text. Results already in it are not generated again, so an
+                interrupted job can be resumed, even with a reordered or extended list of texts.
+
+        Returns:
+            List[Optional[str]]: The generated texts in input order; None for any that failed.
+        """
+        generate = getattr(LLMHelper, method)
+        completion_tokens = inspect.signature(generate).parameters["max_tokens"].default
+        keys = [hashlib.sha256(f"{method}\0{text}".encode()).hexdigest() for text in texts]
+        generated: Dict[str, str] = {}
+
+        if checkpoint:
+            try:
+                with open(checkpoint) as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        generated[entry["key"]] = entry["result"]
+            except FileNotFoundError:
+                pass
+        # Generate each distinct text without a checkpointed result once, however many times it appears
+        first_index: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in generated:
+                first_index.setdefault(key, i)
+        pending = list(first_index.values())
+        logger.info("Running %s over %d texts (%d already done)", method, len(pending), len(texts) - len(pending))
+
+        checkpoint_file = open(checkpoint, "a") if checkpoint else None
+        running = set()
+
+        async def process(i: int):
+            result = await generate(texts[i])
+            if result is None:
+                logger.error("Failed to run %s on text %d", method, i)
+                return
+            generated[keys[i]] = result
+            if checkpoint_file:
+                checkpoint_file.write(json.dumps({"key": keys[i], "result": result}) + "\n")
+                checkpoint_file.flush()
+
+        loop = asyncio.get_running_loop()
+        request_capacity, token_capacity = max_rpm, max_tpm
+        last_update = loop.time()
         try:
-            title = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "user", "content": "Generate a title(max 5 words) and just answer with the title, for this: " + text}
-                ],
-            )
-            title = title.choices[0].message.content.strip().split("\n")
-            summary = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "user", "content": "Generate a summary for this" + text}
-                ],
-            )
-            summary = summary.choices[0].message.content.strip().split("\n")
-            
-            result = {"title": "\n".join(title), "summary": "\n".join(summary)}
-            logger.info("Generated title: %s", result["title"])
-            logger.info("Generated summary: %s", result["summary"][:100])
-            return result
-        except Exception as e:
-            logger.error("Error generating summary and title: %s", e)
-            return None
+            for i in pending:
+                tokens = min(_count_tokens(texts[i]) + completion_tokens, max_tpm)
+                while True:
+                    # Refill the budgets in proportion to the time elapsed
+                    now = loop.time()
+                    elapsed, last_update = now - last_update, now
+                    request_capacity = min(max_rpm, request_capacity + max_rpm * elapsed / 60)
+                    token_capacity = min(max_tpm, token_capacity + max_tpm * elapsed / 60)
+                    if request_capacity >= 1 and token_capacity >= tokens:
+                        break
+                    # Sleep until both budgets have refilled enough for this text
+                    await asyncio.sleep(max(
+                        (1 - request_capacity) * 60 / max_rpm, (tokens - token_capacity) * 60 / max_tpm
+                    ))
+                request_capacity -= 1
+                token_capacity -= tokens
+                task = asyncio.create_task(process(i))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            await asyncio.gather(*running)
+        finally:
+            for task in running:
+                task.cancel()
+            if checkpoint_file:
+                checkpoint_file.close()
+
+        results = [generated.get(key) for key in keys]
+        logger.info("Finished %s over %d texts, %d failed", method, len(texts), sum(result is None for result in results))
+        return results
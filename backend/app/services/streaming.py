@@ -0,0 +1,70 @@
+"""
+Streaming helpers
+
+This module provides helpers for endpoints that stream generated text to the client. Generations
+are stopped as soon as the client disconnects, so no tokens are spent on text nobody will read,
+and idle streams can be kept open with periodic keep-alive ticks.
+
+Usage in an endpoint:
+
+    async for chunk in until_disconnected(request, LLMHelper.astream_response(prompt)):
+        if chunk is None:
+            yield ": keep-alive\n\n"
+            continue
+        ...
+"""
+
+import asyncio
+from typing import AsyncIterator, Optional, TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+# Seconds without a chunk after which a keep-alive tick is emitted
+KEEPALIVE_INTERVAL = 15.0
+
+
+async def until_disconnected(
+    request: Request, stream: AsyncIterator[T], keepalive: Optional[float] = KEEPALIVE_INTERVAL
+) -> AsyncIterator[Optional[T]]:
+    """
+    Relay a stream's items while the client is connected.
+
+    The stream is closed as soon as the client disconnects or the caller stops iterating, which
+    aborts an underlying LLM generation instead of letting it run to the end.
+
+    Args:
+        request (Request): The request whose client is streamed to.
+        stream (AsyncIterator[T]): The stream to relay, e.g. one of LLMHelper's astream_* generators.
+        keepalive (Optional[float], optional): Seconds without an item after which None is yielded,
+            so the caller can send a keep-alive; None to never yield keep-alive ticks. Default is
+            KEEPALIVE_INTERVAL.
+
+    Yields:
+        Optional[T]: The stream's items, and None for each keep-alive tick.
+    """
+    iterator = stream.__aiter__()
+    pending = None
+    try:
+        while not await request.is_disconnected():
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=keepalive)
+            if not done:
+                yield None
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                return
+            pending = None
+            yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
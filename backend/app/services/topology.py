@@ -0,0 +1,33 @@
+"""
+Whiteboard topology helpers
+
+A whiteboard's topology_version is bumped whenever its set of nodes or connections changes, so
+results derived from the node graph (such as the report's node groups) can be cached per
+(whiteboard_id, topology_version) and are invalidated by any structural edit.
+"""
+
+from typing import Union
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from app.models.whiteboard import Whiteboard
+
+
+async def bump_topology_version(db: AsyncSession, whiteboard_id: Union[int, ColumnElement]):
+    """
+    Increment a whiteboard's topology version in the current transaction.
+
+    The increment is done in SQL, so concurrent edits cannot lose a bump.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async session to execute the update in.
+        whiteboard_id (Union[int, ColumnElement]): The whiteboard's ID, or a scalar subquery selecting it.
+    """
+    await db.execute(
+        update(Whiteboard)
+        .where(Whiteboard.id == whiteboard_id)
+        .values(topology_version=Whiteboard.topology_version + 1)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,263 @@
+"""
+Behavior of the LLM helpers that do not depend on OpenAI's answers: in-flight coalescing,
+response caching, streaming and bulk runs. OpenAI calls are replaced by local coroutines.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm
+
+
+@pytest.fixture(autouse=True)
+def clear_llm_state():
+    """
+    Start every test with empty response caches and no in-flight calls.
+    """
+    llm._response_cache.clear()
+    llm._semantic_index.clear()
+    llm._inflight.clear()
+    yield
+    llm._response_cache.clear()
+    llm._semantic_index.clear()
+    llm._inflight.clear()
+
+
+def test_coalesce_shares_one_call_between_concurrent_callers():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*[llm._coalesce("test", "key", call) for _ in range(3)])
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert len(calls) == 1
+    assert not llm._inflight
+
+
+def test_coalesce_follower_calls_again_when_leader_is_cancelled():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return f"result {len(calls)}"
+
+    async def main():
+        leader = asyncio.create_task(llm._coalesce("test", "key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(llm._coalesce("test", "key", call))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "result 2"
+    assert len(calls) == 2
+    assert not llm._inflight
+
+
+def test_coalesce_follower_calls_again_when_leader_fails():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return "result"
+
+    async def main():
+        return await asyncio.gather(
+            llm._coalesce("test", "key", call), llm._coalesce("test", "key", call), return_exceptions=True
+        )
+
+    leader, follower = asyncio.run(main())
+    assert isinstance(leader, RuntimeError)
+    assert follower == "result"
+    assert len(calls) == 2
+
+
+def test_coalesce_does_not_share_calls_between_keys():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(llm._coalesce("test", "a", call), llm._coalesce("test", "b", call))
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_semantic_tier_reuses_near_duplicate_and_skips_evicted_responses(monkeypatch):
+    vectors = {"intro a": [1.0, 0.0], "intro a!": [0.99, 0.01], "other": [0.0, 1.0]}
+
+    async def embed(text):
+        return llm._normalize(vectors[text])
+
+    monkeypatch.setattr(llm, "_aembed", embed)
+    calls = []
+
+    @llm.cache_response("test", similarity=0.95)
+    async def generate(text, max_tokens=50, temperature=0.7, model="model"):
+        calls.append(text)
+        return f"answer to {text}"
+
+    async def main():
+        first = await generate("intro a")
+        near_duplicate = await generate("intro a!")
+        different = await generate("other")
+        return first, near_duplicate, different
+
+    assert asyncio.run(main()) == ("answer to intro a", "answer to intro a", "answer to other")
+    assert calls == ["intro a", "other"]
+
+    # A cached response evicted from the exact cache is no longer offered by the semantic tier
+    llm._response_cache.clear()
+    asyncio.run(generate("intro a!"))
+    assert calls == ["intro a", "other", "intro a!"]
+
+
+@pytest.fixture
+def fake_summaries(monkeypatch):
+    """
+    Replace agenerate_summary with a local generator that fails for texts starting with "fail",
+    and count tokens by characters (tiktoken needs its encoding downloaded).
+
+    Returns:
+        list: The texts the generator was called with, in call order.
+    """
+    calls = []
+
+    async def generate(text, max_tokens=10, temperature=0.7, model="model"):
+        calls.append(text)
+        await asyncio.sleep(0)
+        return None if text.startswith("fail") else f"summary of {text}"
+
+    monkeypatch.setattr(llm.LLMHelper, "agenerate_summary", staticmethod(generate))
+    monkeypatch.setattr(llm, "_count_tokens", len)
+    return calls
+
+
+def test_run_many_returns_results_in_order_and_generates_duplicates_once(fake_summaries):
+    results = asyncio.run(llm.LLMHelper.run_many(["a", "b", "a", "fail"]))
+
+    assert results == ["summary of a", "summary of b", "summary of a", None]
+    # Failures are not retried on top of the client's own retries
+    assert sorted(fake_summaries) == ["a", "b", "fail"]
+
+
+def test_run_many_resumes_from_checkpoint_by_text(fake_summaries, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    asyncio.run(llm.LLMHelper.run_many(["a", "b", "fail"], checkpoint=checkpoint))
+    fake_summaries.clear()
+
+    # A reordered and extended list reuses the results of the texts themselves
+    results = asyncio.run(llm.LLMHelper.run_many(["c", "b", "fail", "a"], checkpoint=checkpoint))
+
+    assert results == ["summary of c", "summary of b", None, "summary of a"]
+    assert sorted(fake_summaries) == ["c", "fail"]
+
+
+def test_run_many_waits_for_the_request_budget(fake_summaries):
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # The budget holds 600 requests and refills 10 per second, so the last 2 wait ~0.1s each
+        results = await llm.LLMHelper.run_many([str(i) for i in range(602)], max_rpm=600)
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(main())
+    assert None not in results
+    assert elapsed >= 0.15
+
+
+class FakeStream:
+    """
+    An OpenAI chat completion stream of the given content deltas.
+    """
+
+    def __init__(self, deltas):
+        self.events = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))]) for delta in deltas
+        ]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for event in self.events:
+            yield event
+
+    async def close(self):
+        pass
+
+
+def fake_client(deltas):
+    async def create(**kwargs):
+        return FakeStream(deltas)
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_stream_caches_complete_text(monkeypatch):
+    monkeypatch.setattr(llm, "aclient", fake_client(["Hello", " world "]))
+
+    async def collect():
+        return [chunk async for chunk in llm.LLMHelper.astream_response("prompt")]
+
+    assert asyncio.run(collect()) == ["Hello", " world "]
+    assert list(llm._response_cache.values()) == ["Hello world"]
+
+
+def test_stream_does_not_cache_empty_text(monkeypatch):
+    monkeypatch.setattr(llm, "aclient", fake_client([None, "  "]))
+
+    async def collect():
+        return [chunk async for chunk in llm.LLMHelper.astream_response("prompt")]
+
+    asyncio.run(collect())
+    assert not llm._response_cache
+
+
+def test_cache_response_fans_one_generation_out_to_duplicate_prompts():
+    calls = []
+
+    @llm.cache_response("test")
+    async def generate(text, max_tokens=50, temperature=0.7, model="model"):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return f"answer to {text}"
+
+    async def main():
+        concurrent = await asyncio.gather(generate("a"), generate("a"), generate("b"), generate("a"))
+        return concurrent, await generate("a")
+
+    concurrent, later = asyncio.run(main())
+    assert concurrent == ["answer to a", "answer to a", "answer to b", "answer to a"]
+    assert later == "answer to a"
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_cache_response_does_not_cache_failures():
+    calls = []
+
+    @llm.cache_response("test")
+    async def generate(text, max_tokens=50, temperature=0.7, model="model"):
+        calls.append(text)
+        return None if len(calls) == 1 else "answer"
+
+    assert asyncio.run(generate("a")) is None
+    assert asyncio.run(generate("a")) == "answer"
+    assert len(calls) == 2
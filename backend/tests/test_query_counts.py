@@ -0,0 +1,63 @@
+"""
+Guards against N+1 query regressions: the number of SQL statements these endpoints issue must
+not grow with the number of nodes, connections or interactions involved.
+"""
+
+from app.services.llm import LLMHelper
+
+NODE_COUNT = 5
+INTERACTIONS_PER_NODE = 3
+
+
+def create_graph(client) -> list:
+    """
+    Create a whiteboard with NODE_COUNT connected nodes, each with a few interactions.
+
+    Returns:
+        list: The created nodes' IDs.
+    """
+    whiteboard = client.post("/api/whiteboard/", json={"name": "Whiteboard"}).json()
+    node_ids = [
+        client.post("/api/node/", json={"whiteboard_id": whiteboard["id"], "name": f"Node {i}"}).json()["id"]
+        for i in range(NODE_COUNT)
+    ]
+    for source_id, target_id in zip(node_ids, node_ids[1:]):
+        response = client.post(
+            f"/api/node/{source_id}/connect",
+            params={"target_node_id": target_id, "type_of_connection": "main_connection"},
+        )
+        assert response.status_code == 200, response.text
+    for node_id in node_ids:
+        for i in range(INTERACTIONS_PER_NODE):
+            response = client.post(f"/api/node/{node_id}/interact", params={"role": "user", "content": f"Message {i}"})
+            assert response.status_code == 200, response.text
+    return node_ids
+
+
+def test_get_all_nodes_query_count(client, count_queries):
+    create_graph(client)
+
+    count_queries.clear()
+    response = client.get("/api/node/")
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == NODE_COUNT
+    # The nodes, then their connections and interaction history with one SELECT each
+    assert len(count_queries) <= 3, count_queries
+
+
+def test_generate_node_summary_query_count(client, count_queries, monkeypatch):
+    node_ids = create_graph(client)
+
+    async def fake_summary_and_title(text, *args, **kwargs):
+        return {"title": "Title", "summary": "Summary"}
+
+    monkeypatch.setattr(LLMHelper, "agenerate_summary_and_title", staticmethod(fake_summary_and_title))
+
+    count_queries.clear()
+    response = client.post(f"/api/node/{node_ids[0]}/generate-summary")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["summary"] == "Summary"
+    # The node, its connections and interaction history, then the UPDATE of its summary and title
+    assert len(count_queries) <= 4, count_queries
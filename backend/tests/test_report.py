@@ -0,0 +1,59 @@
+"""
+Behavior of the non-streaming report endpoint when the LLM succeeds or fails.
+"""
+
+from app.services.llm import LLMHelper
+
+
+def create_whiteboard(client) -> int:
+    """
+    Create a whiteboard with a subject and two unconnected nodes, i.e. two report sections.
+
+    Returns:
+        int: The whiteboard's ID.
+    """
+    whiteboard_id = client.post("/api/whiteboard/", json={"name": "Whiteboard"}).json()["id"]
+    client.post("/api/subject/", json={"name": "Subject", "whiteboard_id": whiteboard_id})
+    for name in ("First", "Second"):
+        client.post("/api/node/", json={"whiteboard_id": whiteboard_id, "name": name})
+    return whiteboard_id
+
+
+def stub_llm(monkeypatch, failing_call=None):
+    """
+    Answer introductions and bodies locally; the failing_call-th body generation fails (None).
+    """
+    calls = []
+
+    async def generate_introduction(text, *args, **kwargs):
+        return "Introduction"
+
+    async def generate_body(text, *args, **kwargs):
+        calls.append(text)
+        return None if len(calls) == failing_call else f"Body {len(calls)}"
+
+    monkeypatch.setattr(LLMHelper, "agenerate_introduction", staticmethod(generate_introduction))
+    monkeypatch.setattr(LLMHelper, "agenerate_body", staticmethod(generate_body))
+
+
+def test_generate_report(client, monkeypatch):
+    whiteboard_id = create_whiteboard(client)
+    stub_llm(monkeypatch)
+
+    response = client.post("/api/report/", json={"whiteboard_id": whiteboard_id})
+
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["introduction"] == "Introduction"
+    assert report["body"] == "Body 1\n\nBody 2"
+    assert report["conclusion"] == "Body 3"
+
+
+def test_generate_report_with_failed_section(client, monkeypatch):
+    whiteboard_id = create_whiteboard(client)
+    stub_llm(monkeypatch, failing_call=2)
+
+    response = client.post("/api/report/", json={"whiteboard_id": whiteboard_id})
+
+    assert response.status_code == 502, response.text
+    assert client.get("/api/report/").json() == []